@@ -1,7 +1,9 @@
 import os
 import base64
 import time
-from typing import List
+import random
+import functools
+from typing import Dict, List, Optional
 from openai import OpenAI
 from bs4 import BeautifulSoup
 import re
@@ -13,44 +15,76 @@ def encode_image(image_path: str) -> str:
         return base64.b64encode(image_file.read()).decode("utf-8")
 
 
-def inference_with_api_text_only(prompt: str, sys_prompt: str = "You are a helpful assistant.", 
-                               model_id: str = "Qwen/Qwen2.5-VL-7B-Instruct",
-                               max_retries: int = 3, retry_delay: float = 1.0) -> str:
+# 指数退避的最大等待时间（秒）
+_MAX_RETRY_DELAY = 30.0
+
+
+@functools.lru_cache(maxsize=None)
+def _get_client(api_key: str) -> OpenAI:
     """
-    使用API调用Qwen模型进行纯文本推理（不需要图像）
+    获取共享的API客户端（客户端线程安全，复用底层HTTP连接池，避免每次请求重新建立TLS连接）
     
     Args:
-        prompt: 提示词
-        sys_prompt: 系统提示词
-        model_id: 模型ID
-        max_retries: 最大重试次数
-        retry_delay: 重试间隔（秒）
+        api_key: API密钥
     
     Returns:
-        模型输出内容
+        OpenAI客户端
     """
-    # 从环境变量获取API密钥
-    api_key = os.getenv("MODELSCOPE_SDK_TOKEN") or os.getenv("DASHSCOPE_API_KEY")
-    if not api_key:
-        raise Exception("请设置 MODELSCOPE_SDK_TOKEN 或 DASHSCOPE_API_KEY 环境变量")
-    
-    client = OpenAI(
+    return OpenAI(
         api_key=api_key,
-        base_url="https://api-inference.modelscope.cn/v1/"
+        base_url="https://api-inference.modelscope.cn/v1/",
+        max_retries=0  # 重试由_create_completion_with_retry按错误类型统一处理
     )
 
-    messages = [
-        {
-            "role": "system",
-            "content": [{"type": "text", "text": sys_prompt}]
-        },
-        {
-            "role": "user",
-            "content": [{"type": "text", "text": prompt}]
-        }
-    ]
+
+def _retry_wait(error: Exception, attempt: int, retry_delay: float) -> Optional[float]:
+    """
+    根据错误类型计算重试前的等待时间
     
-    # 添加重试机制
+    Args:
+        error: API调用抛出的异常
+        attempt: 当前尝试序号（从0开始）
+        retry_delay: 基础重试间隔（秒）
+    
+    Returns:
+        等待秒数；不可重试的错误（除429/408/409以外的4xx）返回None
+    """
+    status_code = getattr(error, 'status_code', None)
+    backoff = min(_MAX_RETRY_DELAY, retry_delay * (2 ** attempt))
+    
+    if status_code == 429:
+        # 限流：优先遵循服务端返回的Retry-After
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(_MAX_RETRY_DELAY, float(retry_after))
+        except (TypeError, ValueError):
+            return backoff
+    
+    if status_code is not None and 400 <= status_code < 500 and status_code not in (408, 409):
+        return None
+    
+    # 5xx、超时、连接错误和空结果：指数退避加随机抖动，避免多个线程同时重试
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def _create_completion_with_retry(client: OpenAI, model_id: str, messages: List[dict],
+                                  max_retries: int, retry_delay: float,
+                                  retry_stats: Optional[Dict[str, int]] = None) -> str:
+    """
+    调用模型并按错误类型重试
+    
+    Args:
+        client: API客户端
+        model_id: 模型ID
+        messages: 对话消息
+        max_retries: 最大重试次数
+        retry_delay: 基础重试间隔（秒）
+        retry_stats: 重试统计字典，重试时累加其中的'retries'计数
+    
+    Returns:
+        模型输出内容
+    """
     last_exception = None
     for attempt in range(max_retries + 1):
         try:
@@ -69,12 +103,16 @@ def inference_with_api_text_only(prompt: str, sys_prompt: str = "You are a helpf
                 
         except Exception as e:
             last_exception = e
+            wait = _retry_wait(e, attempt, retry_delay)
+            if wait is None:
+                print(f"❌ API调用失败（不可重试的错误）: {str(e)}")
+                break
             if attempt < max_retries:
                 print(f"⚠️ API调用失败（第{attempt + 1}次尝试）: {str(e)}")
-                print(f"🔄 等待 {retry_delay} 秒后重试...")
-                time.sleep(retry_delay)
-                # 每次重试增加延迟时间，避免频繁请求
-                retry_delay *= 1.5
+                print(f"🔄 等待 {wait:.1f} 秒后重试...")
+                if retry_stats is not None:
+                    retry_stats['retries'] = retry_stats.get('retries', 0) + 1
+                time.sleep(wait)
             else:
                 print(f"❌ API调用失败，已达到最大重试次数 ({max_retries + 1})")
     
@@ -82,10 +120,52 @@ def inference_with_api_text_only(prompt: str, sys_prompt: str = "You are a helpf
     raise last_exception
 
 
+def inference_with_api_text_only(prompt: str, sys_prompt: str = "You are a helpful assistant.", 
+                               model_id: str = "Qwen/Qwen2.5-VL-7B-Instruct",
+                               max_retries: int = 3, retry_delay: float = 1.0,
+                               retry_stats: Optional[Dict[str, int]] = None) -> str:
+    """
+    使用API调用Qwen模型进行纯文本推理（不需要图像）
+    
+    Args:
+        prompt: 提示词
+        sys_prompt: 系统提示词
+        model_id: 模型ID
+        max_retries: 最大重试次数
+        retry_delay: 基础重试间隔（秒），按指数退避增长
+        retry_stats: 重试统计字典，重试时累加其中的'retries'计数
+    
+    Returns:
+        模型输出内容
+    """
+    # 从环境变量获取API密钥
+    api_key = os.getenv("MODELSCOPE_SDK_TOKEN") or os.getenv("DASHSCOPE_API_KEY")
+    if not api_key:
+        raise Exception("请设置 MODELSCOPE_SDK_TOKEN 或 DASHSCOPE_API_KEY 环境变量")
+    
+    client = _get_client(api_key)
+
+    messages = [
+        {
+            "role": "system",
+            "content": [{"type": "text", "text": sys_prompt}]
+        },
+        {
+            "role": "user",
+            "content": [{"type": "text", "text": prompt}]
+        }
+    ]
+    
+    # 按错误类型重试：429遵循Retry-After，5xx/网络错误指数退避，其余4xx立即失败
+    return _create_completion_with_retry(client, model_id, messages, max_retries, retry_delay, retry_stats)
+
+
 def inference_with_api(image_path: str, prompt: str, sys_prompt: str = "You are a helpful assistant.", 
                       model_id: str = "Qwen/Qwen2.5-VL-72B-Instruct", 
                       min_pixels: int = 512*28*28, max_pixels: int = 2048*28*28,
-                      max_retries: int = 3, retry_delay: float = 1.0) -> str:
+                      max_retries: int = 3, retry_delay: float = 1.0,
+                      retry_stats: Optional[Dict[str, int]] = None,
+                      image_base64: Optional[str] = None) -> str:
     """
     使用API调用Qwen2.5-VL模型进行图片解析
     
@@ -97,22 +177,21 @@ def inference_with_api(image_path: str, prompt: str, sys_prompt: str = "You are
         min_pixels: 最小像素数
         max_pixels: 最大像素数
         max_retries: 最大重试次数
-        retry_delay: 重试间隔（秒）
+        retry_delay: 基础重试间隔（秒），按指数退避增长
+        retry_stats: 重试统计字典，重试时累加其中的'retries'计数
+        image_base64: 已编码的JPEG图片base64字符串，提供时不再读取image_path
     
     Returns:
         模型输出的HTML内容
     """
-    base64_image = encode_image(image_path)
+    base64_image = image_base64 if image_base64 is not None else encode_image(image_path)
     
     # 从环境变量获取API密钥
     api_key = os.getenv("MODELSCOPE_SDK_TOKEN") or os.getenv("DASHSCOPE_API_KEY")
     if not api_key:
         raise Exception("请设置 MODELSCOPE_SDK_TOKEN 或 DASHSCOPE_API_KEY 环境变量")
     
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://api-inference.modelscope.cn/v1/"
-    )
+    client = _get_client(api_key)
 
     messages = [
         {
@@ -133,36 +212,8 @@ def inference_with_api(image_path: str, prompt: str, sys_prompt: str = "You are
         }
     ]
     
-    # 添加重试机制
-    last_exception = None
-    for attempt in range(max_retries + 1):
-        try:
-            completion = client.chat.completions.create(
-                model=model_id,
-                messages=messages,
-            )
-            
-            result = completion.choices[0].message.content
-            if result and result.strip():  # 检查结果是否有效
-                if attempt > 0:
-                    print(f"✅ API调用成功（第{attempt + 1}次尝试）")
-                return result
-            else:
-                raise Exception("API返回空结果")
-                
-        except Exception as e:
-            last_exception = e
-            if attempt < max_retries:
-                print(f"⚠️ API调用失败（第{attempt + 1}次尝试）: {str(e)}")
-                print(f"🔄 等待 {retry_delay} 秒后重试...")
-                time.sleep(retry_delay)
-                # 每次重试增加延迟时间，避免频繁请求
-                retry_delay *= 1.5
-            else:
-                print(f"❌ API调用失败，已达到最大重试次数 ({max_retries + 1})")
-    
-    # 如果所有重试都失败，抛出最后一个异常
-    raise last_exception
+    # 按错误类型重试：429遵循Retry-After，5xx/网络错误指数退避，其余4xx立即失败
+    return _create_completion_with_retry(client, model_id, messages, max_retries, retry_delay, retry_stats)
 
 
 def clean_and_format_html(full_predict: str) -> str:
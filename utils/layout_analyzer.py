@@ -395,7 +395,7 @@ class LayoutAnalyzer:
                 dpi = 300
                 scale_factor = dpi / 72.0  # 72dpi为默认值，转换为300dpi
                 mat = fitz.Matrix(scale_factor, scale_factor)
-                pix = page.get_pixmap(matrix=mat)
+                pix = page.get_pixmap(matrix=mat, colorspace=fitz.csRGB, alpha=False)
                 page_image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
                 
                 # 计算缩放比例
@@ -2,25 +2,703 @@
 # -*- coding: utf-8 -*-
 
 import os
+import io
+import base64
 import fitz  # PyMuPDF
 import json
 import math
 import time
-from typing import Dict, List, Any, Tuple, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+import queue
+import hashlib
+import sqlite3
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import Dict, List, Any, Tuple, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from threading import Lock
 import threading
+import numpy as np
+
+try:
+    import orjson  # 可选依赖：C实现的JSON序列化/解析，加快元数据写入与模型响应解析
+except ImportError:
+    orjson = None
+
+try:
+    import numba  # 可选依赖：JIT编译矢量图密集区域检测的邻居查找
+except ImportError:
+    numba = None
+
+
+def _dumps_json(obj: Any) -> bytes:
+    """
+    将对象序列化为缩进2格的UTF-8 JSON字节串（优先使用orjson）
+    
+    Args:
+        obj: 要序列化的对象
+        
+    Returns:
+        JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _loads_json(text: str) -> Any:
+    """
+    解析JSON字符串（优先使用orjson，解析失败时抛出json.JSONDecodeError或其子类）
+    
+    Args:
+        text: JSON字符串
+        
+    Returns:
+        解析后的对象
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+if numba is not None:
+    @numba.njit(nogil=True, cache=True)
+    def _in_dense_area(bxs, i, j, area_size):
+        """判断元素j是否落在以元素i中心为中心的密集区域内（与_detect_dense_area_elements的判定一致）"""
+        half = area_size / 2
+        center_x = (bxs[i, 0] + bxs[i, 2]) / 2
+        center_y = (bxs[i, 1] + bxs[i, 3]) / 2
+        area_left = center_x - half
+        area_right = center_x + half
+        area_top = center_y - half
+        area_bottom = center_y + half
+        
+        other_center_x = (bxs[j, 0] + bxs[j, 2]) / 2
+        other_center_y = (bxs[j, 1] + bxs[j, 3]) / 2
+        if area_left <= other_center_x <= area_right and area_top <= other_center_y <= area_bottom:
+            return True
+        
+        # 与密集区域重叠面积超过较小框的10%
+        x1_inter = max(area_left, bxs[j, 0])
+        y1_inter = max(area_top, bxs[j, 1])
+        x2_inter = min(area_right, bxs[j, 2])
+        y2_inter = min(area_bottom, bxs[j, 3])
+        if x1_inter >= x2_inter or y1_inter >= y2_inter:
+            return False
+        inter_area = (x2_inter - x1_inter) * (y2_inter - y1_inter)
+        area1 = (area_right - area_left) * (area_bottom - area_top)
+        area2 = (bxs[j, 2] - bxs[j, 0]) * (bxs[j, 3] - bxs[j, 1])
+        smaller_area = min(area1, area2)
+        if smaller_area <= 0:
+            return False
+        return inter_area > 0.1 * smaller_area
+    
+    # 不使用parallel=True：页面已由多个工作线程并行处理，nogil使各线程可同时执行该核函数；
+    # 多线程同时调用并行核函数时numba默认的workqueue线程层会直接终止进程
+    @numba.njit(nogil=True, cache=True)
+    def _dense_area_neighbors(bxs, area_size):
+        """
+        计算每个元素密集区域内的其他元素
+        
+        Args:
+            bxs: (N, 4) float64 边界框数组
+            area_size: 密集区域大小
+            
+        Returns:
+            (offsets, neighbors)：元素i的邻居为neighbors[offsets[i]:offsets[i + 1]]
+        """
+        n = bxs.shape[0]
+        counts = np.zeros(n, np.int64)
+        for i in range(n):
+            c = 0
+            for j in range(n):
+                if i != j and _in_dense_area(bxs, i, j, area_size):
+                    c += 1
+            counts[i] = c
+        
+        offsets = np.zeros(n + 1, np.int64)
+        for i in range(n):
+            offsets[i + 1] = offsets[i] + counts[i]
+        
+        neighbors = np.empty(offsets[n], np.int64)
+        for i in range(n):
+            k = offsets[i]
+            for j in range(n):
+                if i != j and _in_dense_area(bxs, i, j, area_size):
+                    neighbors[k] = j
+                    k += 1
+        return offsets, neighbors
+    
+    # 导入时预热（有磁盘缓存时开销很小），避免首页处理承担编译延迟
+    _dense_area_neighbors(np.zeros((2, 4), np.float64), 30.0)
+
+
+# NumPy分块计算两两重叠关系时每块的行数（每块中间数组约为 块行数 x N 个float64）
+_OVERLAP_BLOCK_SIZE = 512
+
+
+def _bboxes_to_array(elements: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    将元素边界框转换为 (N, 4) float64 数组
+    
+    Args:
+        elements: 元素列表
+        
+    Returns:
+        边界框数组，每行为 [x0, y0, x1, y1]
+    """
+    if not elements:
+        return np.zeros((0, 4), np.float64)
+    return np.array([element['bbox'] for element in elements], dtype=np.float64)
+
+
+def _element_rect(element: Dict[str, Any]) -> fitz.Rect:
+    """
+    获取元素的矩形（元素只保存bbox，Rect仅在绘制时构造；兼容旧缓存中预先创建了rect的元素）
+    
+    Args:
+        element: 元素字典
+        
+    Returns:
+        元素矩形
+    """
+    rect = element.get('rect')
+    return rect if rect is not None else fitz.Rect(element['bbox'])
+
+
+def _bbox_areas(boxes: np.ndarray) -> np.ndarray:
+    """
+    计算边界框面积
+    
+    Args:
+        boxes: (N, 4) float64 边界框数组
+        
+    Returns:
+        (N,) 面积数组
+    """
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+def _boxes_overlap_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray, overlap_threshold: float,
+                          areas_a: Optional[np.ndarray] = None, areas_b: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    批量计算两组边界框的两两重叠关系（判定与PDFBboxExtractor._boxes_overlap一致）
+    
+    Args:
+        boxes_a: (N, 4) float64 边界框数组
+        boxes_b: (M, 4) float64 边界框数组
+        overlap_threshold: 重叠阈值（交集占较小框面积的比例）
+        areas_a: boxes_a的面积，分块重复调用时可预先计算后传入
+        areas_b: boxes_b的面积，分块重复调用时可预先计算后传入
+        
+    Returns:
+        (N, M) 布尔数组，[i, j]表示boxes_a[i]与boxes_b[j]重叠
+    """
+    x1_inter = np.maximum(boxes_a[:, None, 0], boxes_b[:, 0])
+    y1_inter = np.maximum(boxes_a[:, None, 1], boxes_b[:, 1])
+    x2_inter = np.minimum(boxes_a[:, None, 2], boxes_b[:, 2])
+    y2_inter = np.minimum(boxes_a[:, None, 3], boxes_b[:, 3])
+    
+    if areas_a is None:
+        areas_a = _bbox_areas(boxes_a)
+    if areas_b is None:
+        areas_b = _bbox_areas(boxes_b)
+    smaller_area = np.minimum(areas_a[:, None], areas_b)
+    
+    # 无交集或较小框面积非正时不视为重叠；比较乘积避免除法
+    overlapping = (x1_inter < x2_inter) & (y1_inter < y2_inter) & (smaller_area > 0)
+    return overlapping & ((x2_inter - x1_inter) * (y2_inter - y1_inter) > overlap_threshold * smaller_area)
+
+
+def _dense_area_neighbors_numpy(bxs: np.ndarray, area_size: float,
+                                block_size: int = _OVERLAP_BLOCK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    使用NumPy广播分块计算每个元素密集区域内的其他元素（未安装numba时使用，判定与_in_dense_area一致）
+    
+    Args:
+        bxs: (N, 4) float64 边界框数组
+        area_size: 密集区域大小
+        block_size: 每块处理的元素行数，限制 N x N 中间数组的内存占用
+        
+    Returns:
+        (offsets, neighbors)：元素i的邻居为neighbors[offsets[i]:offsets[i + 1]]
+    """
+    n = bxs.shape[0]
+    half = area_size / 2
+    center_x = (bxs[:, 0] + bxs[:, 2]) / 2
+    center_y = (bxs[:, 1] + bxs[:, 3]) / 2
+    # 以每个元素中心为中心的密集区域 [left, top, right, bottom]
+    areas = np.stack([center_x - half, center_y - half, center_x + half, center_y + half], axis=1)
+    area_sizes = _bbox_areas(areas)
+    element_areas = _bbox_areas(bxs)
+    
+    counts = np.zeros(n, np.int64)
+    neighbor_blocks = []
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = areas[start:stop]
+        
+        # 元素中心落在密集区域内，或与密集区域重叠面积超过较小框的10%
+        mask = ((block[:, None, 0] <= center_x) & (center_x <= block[:, None, 2]) &
+                (block[:, None, 1] <= center_y) & (center_y <= block[:, None, 3]))
+        mask |= _boxes_overlap_matrix(block, bxs, 0.1, area_sizes[start:stop], element_areas)
+        
+        # 排除元素自身
+        rows = np.arange(stop - start)
+        mask[rows, rows + start] = False
+        
+        counts[start:stop] = mask.sum(axis=1)
+        neighbor_blocks.append(np.nonzero(mask)[1])
+    
+    offsets = np.zeros(n + 1, np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    neighbors = np.concatenate(neighbor_blocks) if neighbor_blocks else np.zeros(0, np.int64)
+    return offsets, neighbors
+
+
+def _dense_area_closure(bxs: np.ndarray, seeds: np.ndarray, area_size: float) -> np.ndarray:
+    """
+    求种子元素经密集区域邻居关系（不区分方向）可达的全部元素
+    
+    密集区域组由相互邻接的元素构成，只检测包含种子的连通部分即可得到与全量检测相同的组
+    
+    Args:
+        bxs: (N, 4) float64 边界框数组
+        seeds: (N,) 布尔数组，True表示种子元素
+        area_size: 密集区域大小
+        
+    Returns:
+        (N,) 布尔数组，True表示与某个种子连通的元素
+    """
+    if numba is not None:
+        offsets, neighbors = _dense_area_neighbors(bxs, area_size)
+    else:
+        offsets, neighbors = _dense_area_neighbors_numpy(bxs, area_size)
+    sources = np.repeat(np.arange(bxs.shape[0]), np.diff(offsets))
+    
+    reached = seeds.copy()
+    while True:
+        # 沿邻居关系的两个方向各扩展一步，直到不再有新元素加入
+        expanded = reached.copy()
+        expanded[neighbors[reached[sources]]] = True
+        expanded[sources[reached[neighbors]]] = True
+        if (expanded == reached).all():
+            return reached
+        reached = expanded
+
+
+# 批量表格预检查时网格图片中每个页面缩略图的边长（像素）
+_GRID_TILE_SIZE = 384
+
+# Qwen预测框标注使用的颜色（按预测序号循环）
+_PREDICTION_COLORS = ((255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255))
+
+
+@functools.lru_cache(maxsize=64)
+def _smart_resize(height: int, width: int, min_pixels: int, max_pixels: int) -> Tuple[int, int]:
+    """
+    计算Qwen2.5-VL的模型输入尺寸（结果按页面尺寸缓存，同一文档的页面尺寸通常只有少数几种）
+    
+    Args:
+        height: 原图高度
+        width: 原图宽度
+        min_pixels: 最小像素数
+        max_pixels: 最大像素数
+        
+    Returns:
+        (input_height, input_width): 模型输入尺寸
+    """
+    pixels = height * width
+    
+    # 像素数在范围内时尺寸不变，无需开方缩放
+    if min_pixels <= pixels <= max_pixels:
+        input_height, input_width = height, width
+    else:
+        # 放大到min_pixels或缩小到max_pixels
+        scale = math.sqrt((min_pixels if pixels < min_pixels else max_pixels) / pixels)
+        input_height = int(height * scale)
+        input_width = int(width * scale)
+    
+    # 向上取整到28的倍数（Qwen2.5-VL的patch size）
+    return -(-input_height // 28) * 28, -(-input_width // 28) * 28
+
+
+@functools.lru_cache(maxsize=4)
+def _get_font(name: str = "arial.ttf", size: int = 20):
+    """
+    加载并缓存标注字体，避免每张图片重复解析字体文件
+    
+    Args:
+        name: 字体文件名
+        size: 字号
+        
+    Returns:
+        字体对象，加载失败时回退到默认字体或None
+    """
+    from PIL import ImageFont
+    
+    try:
+        # Windows系统字体
+        return ImageFont.truetype(name, size)
+    except Exception:
+        try:
+            # 其他系统默认字体
+            return ImageFont.load_default()
+        except Exception:
+            return None
+
+
+class _ModelSpec:
+    """表格检测使用的模型相关配置（提示词与图片像素范围），按模型ID预先构建，避免每次调用重复构造"""
+    
+    __slots__ = ('check_prompt', 'check_sys_prompt', 'detect_prompt', 'direct_detect_prompt', 'detect_sys_prompt',
+                 'min_pixels', 'max_pixels')
+    
+    def __init__(self, check_prompt: str, check_sys_prompt: str, detect_prompt: str, direct_detect_prompt: str,
+                 detect_sys_prompt: str = "You are a helpful assistant.",
+                 min_pixels: int = 512*28*28, max_pixels: int = 2048*28*28):
+        """
+        Args:
+            check_prompt: 表格预检查提示词
+            check_sys_prompt: 表格预检查系统提示词
+            detect_prompt: 表格边框检测提示词
+            direct_detect_prompt: 不做预检查时使用的表格边框检测提示词（无表格时要求输出空数组）
+            detect_sys_prompt: 表格边框检测系统提示词
+            min_pixels: 模型输入最小像素数（同时用于请求参数和坐标换算）
+            max_pixels: 模型输入最大像素数（同时用于请求参数和坐标换算）
+        """
+        self.check_prompt = check_prompt
+        self.check_sys_prompt = check_sys_prompt
+        self.detect_prompt = detect_prompt
+        self.direct_detect_prompt = direct_detect_prompt
+        self.detect_sys_prompt = detect_sys_prompt
+        self.min_pixels = min_pixels
+        self.max_pixels = max_pixels
+
+
+# Qwen2.5-VL系列输出相对于模型输入尺寸的绝对像素坐标，各尺寸模型共用同一配置
+_QWEN25_VL_SPEC = _ModelSpec(
+    check_prompt="该图片是否有表格，请回答是或否",
+    check_sys_prompt="You are an AI assistant. Please answer whether there are tables in the image with '是' (yes) or '否' (no).",
+    detect_prompt="请定位图片中所有表格的位置，以JSON格式输出其bbox坐标",
+    direct_detect_prompt="请定位图片中所有表格的位置，以JSON格式输出其bbox坐标；如果图片中没有表格，输出[]",
+)
+
+_MODEL_SPECS = {
+    "Qwen/Qwen2.5-VL-3B-Instruct": _QWEN25_VL_SPEC,
+    "Qwen/Qwen2.5-VL-7B-Instruct": _QWEN25_VL_SPEC,
+    "Qwen/Qwen2.5-VL-32B-Instruct": _QWEN25_VL_SPEC,
+    "Qwen/Qwen2.5-VL-72B-Instruct": _QWEN25_VL_SPEC,
+}
+
+
+def _get_model_spec(model_id: str) -> _ModelSpec:
+    """
+    获取模型的表格检测配置（未登记的模型按Qwen2.5-VL处理）
+    
+    Args:
+        model_id: 模型ID
+        
+    Returns:
+        模型配置
+    """
+    return _MODEL_SPECS.get(model_id, _QWEN25_VL_SPEC)
+
+
+class PageStats:
+    """单页元素统计（使用__slots__，避免每页分配统计字典）"""
+    
+    __slots__ = ('text_blocks', 'images', 'tables', 'refined_tables', 'original_lines', 'vector_graphics', 'api_retries')
+    
+    def __init__(self):
+        self.text_blocks = 0
+        self.images = 0
+        self.tables = 0
+        self.refined_tables = 0
+        self.original_lines = 0
+        self.vector_graphics = 0
+        self.api_retries = 0
+    
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典（用于写入缓存）"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> 'PageStats':
+        """从缓存中的字典恢复统计"""
+        stats = cls()
+        for name in cls.__slots__:
+            setattr(stats, name, data.get(name, 0))
+        return stats
+
+
+class PageResult:
+    """单页处理结果"""
+    
+    __slots__ = ('page_num', 'elements', 'stats', 'status', 'error', 'thread_id', 'skipped')
+    
+    def __init__(self, page_num: int, elements: Optional[List[Dict[str, Any]]] = None,
+                 stats: Optional[PageStats] = None, status: str = 'success',
+                 error: Optional[str] = None, thread_id: Optional[int] = None, skipped: bool = False):
+        """
+        Args:
+            page_num: 页面编号（从0开始）
+            elements: 页面元素列表
+            stats: 页面元素统计
+            status: 处理状态（success/partial/error，partial表示表格检测失败但其余元素已提取）
+            error: 错误信息
+            thread_id: 处理该页的线程ID
+            skipped: 是否为跳过处理的空白页
+        """
+        self.page_num = page_num
+        self.elements = elements if elements is not None else []
+        self.stats = stats if stats is not None else PageStats()
+        self.status = status
+        self.error = error
+        self.thread_id = thread_id
+        self.skipped = skipped
+
+
+class _ThreadLocalDocuments:
+    """按线程缓存的PDF文档实例（MuPDF文档不能跨线程共享，每个工作线程只打开一次）"""
+    
+    def __init__(self, pdf_path: str, pdf_data: Optional[bytes] = None):
+        """
+        Args:
+            pdf_path: PDF文件路径
+            pdf_data: 已读入内存的PDF文件内容，提供时各线程直接从内存打开，不再重复读取文件
+        """
+        self.pdf_path = pdf_path
+        self.pdf_data = pdf_data
+        self._local = threading.local()
+        self._docs = []
+        self._lock = Lock()
+    
+    def get(self) -> fitz.Document:
+        """获取当前线程的文档实例，首次调用时打开"""
+        doc = getattr(self._local, 'doc', None)
+        if doc is None or doc.is_closed:
+            if self.pdf_data is not None:
+                doc = fitz.open(stream=self.pdf_data, filetype="pdf")
+            else:
+                doc = fitz.open(self.pdf_path)
+            self._local.doc = doc
+            with self._lock:
+                self._docs.append(doc)
+        return doc
+    
+    def close(self) -> None:
+        """关闭所有线程打开的文档实例"""
+        with self._lock:
+            for doc in self._docs:
+                doc.close()
+            self._docs.clear()
+
+
+# 页面缓存格式版本：元素结构或缓存内容格式变化时递增，旧版本的缓存记录因处理选项不同而不再命中
+_PAGE_CACHE_VERSION = 2
+
+
+class _PageResultCache:
+    """基于SQLite的逐页处理结果缓存，键为(PDF内容MD5, 页码, 模型ID, 处理选项)；同时缓存模型API响应"""
+    
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        # 多个PDF并行处理时各自持有连接写入同一数据库：WAL模式允许读写并发，写锁冲突时等待而非立即报错
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_results ("
+                "pdf_hash TEXT, page INTEGER, model TEXT, options TEXT, payload BLOB, "
+                "PRIMARY KEY (pdf_hash, page, model, options))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pdf_files ("
+                "path TEXT PRIMARY KEY, mtime REAL, size INTEGER, pdf_hash TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vlm_responses (request_key TEXT PRIMARY KEY, response TEXT)"
+            )
+            self._conn.commit()
+    
+    def pdf_hash(self, pdf_path: str, pdf_data: Optional[bytes] = None) -> str:
+        """
+        计算PDF内容的MD5（文件修改时间和大小未变时直接复用上次计算的结果）
+        
+        Args:
+            pdf_path: PDF文件路径
+            pdf_data: 已读入内存的PDF文件内容，提供时直接对其计算MD5，不再重复读取文件
+            
+        Returns:
+            MD5十六进制字符串
+        """
+        abs_path = os.path.abspath(pdf_path)
+        stat = os.stat(abs_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime, size, pdf_hash FROM pdf_files WHERE path = ?", (abs_path,)
+            ).fetchone()
+        if row and row[0] == stat.st_mtime and row[1] == stat.st_size:
+            return row[2]
+        
+        if pdf_data is not None:
+            digest = hashlib.md5(pdf_data).hexdigest()
+        else:
+            md5 = hashlib.md5()
+            with open(abs_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    md5.update(chunk)
+            digest = md5.hexdigest()
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdf_files (path, mtime, size, pdf_hash) VALUES (?, ?, ?, ?)",
+                (abs_path, stat.st_mtime, stat.st_size, digest)
+            )
+            self._conn.commit()
+        return digest
+    
+    def get(self, pdf_hash: str, page_num: int, model: str, options: str) -> Optional[Tuple[List[Dict[str, Any]], 'PageStats']]:
+        """读取缓存的页面结果，未命中时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM page_results WHERE pdf_hash = ? AND page = ? AND model = ? AND options = ?",
+                (pdf_hash, page_num, model, options)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        try:
+            payload = _loads_json(row[0])
+        except ValueError:
+            # 内容损坏的记录视为未命中，重新处理后覆盖
+            return None
+        return payload['elements'], PageStats.from_dict(payload['stats'])
+    
+    def put(self, pdf_hash: str, page_num: int, model: str, options: str,
+            elements: Optional[List[Dict[str, Any]]], stats: Optional['PageStats']) -> None:
+        """写入页面结果（以JSON保存，elements为None时记录为失败页面，payload为NULL）"""
+        payload = None if elements is None else _dumps_json({'elements': elements, 'stats': stats.to_dict()})
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_results (pdf_hash, page, model, options, payload) VALUES (?, ?, ?, ?, ?)",
+                (pdf_hash, page_num, model, options, payload)
+            )
+            self._conn.commit()
+    
+    def failed_pages(self, pdf_hash: str, model: str, options: str) -> List[int]:
+        """查询上次处理失败（payload为NULL）的页面编号"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page FROM page_results WHERE pdf_hash = ? AND model = ? AND options = ? AND payload IS NULL ORDER BY page",
+                (pdf_hash, model, options)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def get_response(self, request_key: str) -> Optional[str]:
+        """读取缓存的模型API响应，未命中时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM vlm_responses WHERE request_key = ?", (request_key,)
+            ).fetchone()
+        return None if row is None else row[0]
+    
+    def put_response(self, request_key: str, response: str) -> None:
+        """写入模型API响应"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vlm_responses (request_key, response) VALUES (?, ?)",
+                (request_key, response)
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def _vlm_request_key(image_data: bytes, prompt: str, sys_prompt: Optional[str], model_id: Optional[str],
+                     min_pixels: int, max_pixels: int) -> str:
+    """
+    计算模型API请求的缓存键（图片内容与影响响应的请求参数）
+    
+    Args:
+        image_data: 上传的图片字节
+        prompt: 提示词
+        sys_prompt: 系统提示词（None表示使用接口默认值）
+        model_id: 模型ID（None表示使用接口默认值）
+        min_pixels: 最小像素数
+        max_pixels: 最大像素数
+        
+    Returns:
+        BLAKE2b十六进制摘要
+    """
+    digest = hashlib.blake2b(image_data, digest_size=32)
+    digest.update(json.dumps([prompt, sys_prompt, model_id, min_pixels, max_pixels], ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class _MemoryResponseCache:
+    """进程内的模型API响应缓存（未使用SQLite缓存时），同一次运行中内容相同的页面图片只请求一次"""
+    
+    def __init__(self):
+        self._responses = {}
+        self._lock = Lock()
+    
+    def get_response(self, request_key: str) -> Optional[str]:
+        """读取缓存的模型响应，未命中时返回None"""
+        with self._lock:
+            return self._responses.get(request_key)
+    
+    def put_response(self, request_key: str, response: str) -> None:
+        """写入模型响应"""
+        with self._lock:
+            self._responses[request_key] = response
+
+
+# 模型API响应缓存：SQLite页面缓存（跨运行复用）或进程内缓存（仅本次运行）
+_ResponseCache = Union[_PageResultCache, _MemoryResponseCache]
+
+
+# 工作线程日志队列，由模块级的单个日志线程依次输出（所有提取器共用，进程内只启动一次，不随提取器数量增长）
+_log_queue = queue.Queue()
+_log_thread = None
+_log_thread_lock = Lock()
+
+
+def _log_worker() -> None:
+    """日志线程：依次输出队列中的日志"""
+    while True:
+        message = _log_queue.get()
+        print(message)
+        _log_queue.task_done()
+
+
+def _start_log_thread() -> None:
+    """启动日志线程（守护线程，进程内仅启动一次）"""
+    global _log_thread
+    with _log_thread_lock:
+        if _log_thread is None:
+            _log_thread = threading.Thread(target=_log_worker, daemon=True)
+            _log_thread.start()
 
 
 class PDFBboxExtractor:
     """PDF边框提取器，用于提取和可视化文本块、图像和表格边框"""
     
-    def __init__(self, max_workers: int = 10):
+    def __init__(self, max_workers: int = 10, verbose: bool = True, save_prediction_images: bool = False):
         """
         初始化PDF边框提取器
         
         Args:
             max_workers: 最大工作线程数，默认10个
+            verbose: 是否输出逐页处理日志
+            save_prediction_images: 是否将Qwen预测框标注到页面图片上并保存到tmp目录（调试用，需要额外解码和编码一次图片）
         """
         self.colors = {
             'text': (0, 1, 0),      # 绿色 - 文本块
@@ -32,12 +710,24 @@ class PDFBboxExtractor:
         }
         self.line_width = 1.0
         self.max_workers = max_workers
+        self.verbose = verbose
+        self.save_prediction_images = save_prediction_images
         self._print_lock = Lock()  # 用于线程安全的打印
     
     def _thread_safe_print(self, message: str):
-        """线程安全的打印函数"""
-        with self._print_lock:
-            print(message)
+        """线程安全的打印函数（日志线程运行时仅入队，不在工作线程中争用stdout）"""
+        if not self.verbose:
+            return
+        if _log_thread is not None:
+            _log_queue.put_nowait(message)
+        else:
+            with self._print_lock:
+                print(message)
+    
+    def _flush_log(self):
+        """等待日志队列中的消息全部输出"""
+        if _log_thread is not None:
+            _log_queue.join()
     
     def _boxes_overlap(self, box1: List[float], box2: List[float], overlap_threshold: float = 0.3) -> bool:
         """
@@ -51,28 +741,21 @@ class PDFBboxExtractor:
         Returns:
             是否重叠
         """
-        # 计算交集
-        x1_inter = max(box1[0], box2[0])
-        y1_inter = max(box1[1], box2[1])
-        x2_inter = min(box1[2], box2[2])
-        y2_inter = min(box1[3], box2[3])
-        
-        # 如果没有交集
-        if x1_inter >= x2_inter or y1_inter >= y2_inter:
+        # 计算交集宽度和高度，任一方向无交集时直接返回
+        inter_width = min(box1[2], box2[2]) - max(box1[0], box2[0])
+        if inter_width <= 0:
+            return False
+        inter_height = min(box1[3], box2[3]) - max(box1[1], box2[1])
+        if inter_height <= 0:
             return False
         
-        # 计算交集面积
-        inter_area = (x2_inter - x1_inter) * (y2_inter - y1_inter)
-        
-        # 计算两个框的面积
-        area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
-        
-        # 计算较小框的重叠比例
-        smaller_area = min(area1, area2)
-        overlap_ratio = inter_area / smaller_area if smaller_area > 0 else 0
+        # 较小框的面积，面积非正时不视为重叠
+        smaller_area = min((box1[2] - box1[0]) * (box1[3] - box1[1]), (box2[2] - box2[0]) * (box2[3] - box2[1]))
+        if smaller_area <= 0:
+            return False
         
-        return overlap_ratio > overlap_threshold
+        # 交集占较小框面积的比例超过阈值（比较乘积，避免除法）
+        return inter_width * inter_height > overlap_threshold * smaller_area
     
     def _remove_overlapping_text_blocks(self, text_blocks: List[Dict[str, Any]], 
                                        table_boxes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -89,23 +772,13 @@ class PDFBboxExtractor:
         if not table_boxes:
             return text_blocks
         
-        filtered_text_blocks = []
-        removed_count = 0
+        if not text_blocks:
+            return text_blocks
         
-        for text_block in text_blocks:
-            text_bbox = text_block['bbox']
-            is_overlapping = False
-            
-            # 检查是否与任何表格重叠
-            for table_box in table_boxes:
-                table_bbox = table_box['bbox']
-                if self._boxes_overlap(text_bbox, table_bbox):
-                    is_overlapping = True
-                    removed_count += 1
-                    break
-            
-            if not is_overlapping:
-                filtered_text_blocks.append(text_block)
+        # 一次性计算所有文字块与表格的重叠关系，与任何表格重叠的文字块被移除
+        overlapping = _boxes_overlap_matrix(_bboxes_to_array(text_blocks), _bboxes_to_array(table_boxes), 0.3).any(axis=1)
+        filtered_text_blocks = [text_block for text_block, removed in zip(text_blocks, overlapping) if not removed]
+        removed_count = len(text_blocks) - len(filtered_text_blocks)
         
         if removed_count > 0:
             self._thread_safe_print(f"  移除了 {removed_count} 个与表格重叠的文字块")
@@ -127,23 +800,19 @@ class PDFBboxExtractor:
         if not images:
             return tables
         
+        if not tables:
+            return tables
+        
+        # 一次性计算所有表格与图像的重叠关系，与任何图像重叠的表格被移除
+        overlapping = _boxes_overlap_matrix(_bboxes_to_array(tables), _bboxes_to_array(images), 0.3).any(axis=1)
         filtered_tables = []
         removed_count = 0
-        
-        for table in tables:
-            table_bbox = table['bbox']
-            is_overlapping = False
-            
-            # 检查是否与任何图像重叠
-            for image in images:
-                image_bbox = image['bbox']
-                if self._boxes_overlap(table_bbox, image_bbox):
-                    is_overlapping = True
-                    removed_count += 1
-                    self._thread_safe_print(f"    移除与图像重叠的表格: {[round(x, 1) for x in table_bbox]}")
-                    break
-            
-            if not is_overlapping:
+        for table, removed in zip(tables, overlapping):
+            if removed:
+                removed_count += 1
+                if self.verbose:
+                    self._thread_safe_print(f"    移除与图像重叠的表格: {[round(x, 1) for x in table['bbox']]}")
+            else:
                 filtered_tables.append(table)
         
         if removed_count > 0:
@@ -165,26 +834,30 @@ class PDFBboxExtractor:
         if len(images) <= 1:
             return images
         
-        # 按面积排序，保留较大的图像
-        sorted_images = sorted(images, key=lambda x: (x['bbox'][2] - x['bbox'][0]) * (x['bbox'][3] - x['bbox'][1]), reverse=True)
+        # 面积只计算一次，排序和重叠判定共用；按面积稳定降序排序，保留较大的图像
+        bxs = _bboxes_to_array(images)
+        areas = _bbox_areas(bxs)
+        order = np.argsort(-areas, kind='stable')
+        sorted_images = [images[i] for i in order]
+        bxs = bxs[order]
+        areas = areas[order]
         
+        kept = np.zeros(len(sorted_images), dtype=bool)
         unique_images = []
         removed_count = 0
         
-        for current_image in sorted_images:
-            is_duplicate = False
-            current_bbox = current_image['bbox']
+        # 分块计算重叠关系：每块只需与排在其前面的图像比较，图像很多时内存占用也保持有界
+        for start in range(0, len(sorted_images), _OVERLAP_BLOCK_SIZE):
+            stop = min(start + _OVERLAP_BLOCK_SIZE, len(sorted_images))
+            overlaps = _boxes_overlap_matrix(bxs[start:stop], bxs[:stop], overlap_threshold, areas[start:stop], areas[:stop])
             
-            # 检查是否与已保留的图像重叠
-            for existing_image in unique_images:
-                existing_bbox = existing_image['bbox']
-                if self._boxes_overlap(current_bbox, existing_bbox, overlap_threshold):
-                    is_duplicate = True
+            for i in range(start, stop):
+                # 检查是否与已保留的图像重叠
+                if overlaps[i - start, :i][kept[:i]].any():
                     removed_count += 1
-                    break
-            
-            if not is_duplicate:
-                unique_images.append(current_image)
+                else:
+                    unique_images.append(sorted_images[i])
+                    kept[i] = True
         
         # 重新分配索引
         for i, image in enumerate(unique_images):
@@ -195,7 +868,7 @@ class PDFBboxExtractor:
         
         return unique_images
     
-    def _extract_page_lines(self, page: fitz.Page) -> List[Dict[str, Any]]:
+    def _extract_page_lines(self, page: fitz.Page) -> Tuple[np.ndarray, np.ndarray]:
         """
         提取页面中的线条和矩形边框
         
@@ -203,53 +876,57 @@ class PDFBboxExtractor:
             page: PyMuPDF页面对象
             
         Returns:
-            线条信息列表
+            (coords, is_rect)：coords为 (K, 4) float64 数组，线条为[起点x, 起点y, 终点x, 终点y]，
+            矩形为其bbox；is_rect为 (K,) 布尔数组
         """
-        lines = []
+        # 坐标按顺序写入一维列表（每个线条/矩形4个数），最后一次性转换为数组，避免逐项创建元组
+        coords = []
+        rect_flags = []
+        add_coords = coords.extend
+        add_flag = rect_flags.append
         
         try:
-            # 获取页面的绘图命令
-            drawings = page.get_drawings()
+            # 读取原始绘图命令（坐标为元组），省去get_drawings为每个点和矩形构造Point/Rect对象的开销
+            drawings = page.get_cdrawings()
             
             for drawing in drawings:
-                for item in drawing.get("items", []):
+                for item in drawing.get("items", ()):
                     # 检查是否是线条或矩形
-                    if item[0] == "l":  # 线条
-                        x1, y1 = item[1]
-                        x2, y2 = item[2]
-                        lines.append({
-                            'type': 'line',
-                            'start': [x1, y1],
-                            'end': [x2, y2],
-                            'bbox': [min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)]
-                        })
-                    elif item[0] == "re":  # 矩形
-                        rect = item[1]
-                        lines.append({
-                            'type': 'rect',
-                            'bbox': [rect.x0, rect.y0, rect.x1, rect.y1]
-                        })
-            
-            return lines
+                    kind = item[0]
+                    if kind == "l":  # 线条
+                        add_coords(item[1])
+                        add_coords(item[2])
+                        add_flag(False)
+                    elif kind == "re":  # 矩形（与get_drawings一致，规范化为左上-右下坐标）
+                        x0, y0, x1, y1 = item[1]
+                        if x0 > x1:
+                            x0, x1 = x1, x0
+                        if y0 > y1:
+                            y0, y1 = y1, y0
+                        add_coords((x0, y0, x1, y1))
+                        add_flag(True)
             
         except Exception as e:
             self._thread_safe_print(f"  ⚠️ 提取页面线条时出错: {str(e)}")
-            return []
+            coords, rect_flags = [], []
+        
+        return np.array(coords, dtype=np.float64).reshape(-1, 4), np.array(rect_flags, dtype=bool)
     
-    def _find_nearest_table_borders(self, predicted_bbox: List[float], page_lines: List[Dict[str, Any]], 
+    def _find_nearest_table_borders(self, predicted_bbox: List[float], page_lines: Tuple[np.ndarray, np.ndarray], 
                                    tolerance: float = 30.0) -> Optional[List[float]]:
         """
         根据预测框查找最近的表格边框线条，并修正坐标
         
         Args:
             predicted_bbox: Qwen预测的表格边框 [x1, y1, x2, y2]
-            page_lines: 页面中的线条列表
+            page_lines: 页面线条数组 (coords, is_rect)，见_extract_page_lines
             tolerance: 容忍距离（像素）
             
         Returns:
             修正后的边框坐标，如果未找到则返回None
         """
-        if not page_lines:
+        coords, is_rect = page_lines
+        if len(coords) == 0:
             return None
         
         # 预测框的四个边
@@ -260,6 +937,21 @@ class PDFBboxExtractor:
         # 检查是否为小高度表格（需要特殊处理）
         is_small_height_table = pred_height < 75.0
         
+        # 先筛出中点靠近预测框某条边的线条和所有矩形，其余线条不可能成为候选，无需参与后续计算
+        # （小高度表格的下边框会在上边框平移后的位置重新搜索，该位置与预测下边界相差不超过tolerance）
+        x_mid = (coords[:, 0] + coords[:, 2]) / 2
+        y_mid = (coords[:, 1] + coords[:, 3]) / 2
+        nearby = (is_rect | (np.abs(x_mid - pred_left) <= tolerance) | (np.abs(x_mid - pred_right) <= tolerance) |
+                  (np.abs(y_mid - pred_top) <= tolerance) | (np.abs(y_mid - pred_bottom) <= 2 * tolerance))
+        if self.verbose:
+            # 逐线条日志只输出筛选后保留的线条，其余线条汇总为一条
+            outside_count = len(coords) - int(np.count_nonzero(nearby))
+            if outside_count:
+                self._thread_safe_print(f"      跳过 {outside_count} 条不在预测框各边附近的线条")
+        if not nearby.any():
+            return None
+        coords, is_rect = coords[nearby], is_rect[nearby]
+        
         # 存储候选边框线及其距离
         candidates = {
             'left': [],    # [(x_pos, distance, y_range)]
@@ -271,249 +963,193 @@ class PDFBboxExtractor:
         if is_small_height_table:
             self._thread_safe_print(f"    🔍 检测到小高度表格 (高度: {pred_height:.1f}px < 50px)，使用优化策略和增强宽容度")
         
-        # 遍历所有线条，找出在容忍度范围内的候选线条
-        for line in page_lines:
-            line_bbox = line['bbox']
-            
-            if line['type'] == 'line':
-                start_x, start_y = line['start']
-                end_x, end_y = line['end']
-                
-                # 垂直线条（可能是左右边框）
-                if abs(start_x - end_x) <= 2:  # 垂直线
-                    x_pos = (start_x + end_x) / 2
-                    y_range = [min(start_y, end_y), max(start_y, end_y)]
-                    
-                    # 检查是否与预测框的垂直范围有足够重叠
-                    overlap_top = max(y_range[0], pred_top - tolerance)
-                    overlap_bottom = min(y_range[1], pred_bottom + tolerance)
-                    overlap_height = overlap_bottom - overlap_top
-                    
-                    # 要求至少50%的重叠度
-                    table_height = pred_bottom - pred_top
-                    line_height = y_range[1] - y_range[0]
-                    min_overlap_required = min(table_height * 0.5, line_height * 0.5)  # 取较小值作为最小重叠要求
-                    
-                    if overlap_height >= min_overlap_required:
-                        # 计算与左边框的距离（只考虑位置合理的线条）
-                        left_distance = abs(x_pos - pred_left)
-                        if left_distance <= tolerance:
-                            # 左边框候选：线条应该在预测左边界的左方或略微右方（不超过表格宽度的1/4）
-                            max_right_offset = pred_width * 0.25  # 允许向右偏移表格宽度的1/4
-                            if x_pos <= pred_left + max_right_offset:
-                                candidates['left'].append((x_pos, left_distance, y_range))
-                            else:
-                                self._thread_safe_print(f"      跳过左边框候选: 线条位置过右 (x={x_pos:.1f}, 预测左边界={pred_left:.1f}, 最大允许={pred_left + max_right_offset:.1f})")
-                        
-                        # 计算与右边框的距离（只考虑位置合理的线条）
-                        right_distance = abs(x_pos - pred_right)
-                        if right_distance <= tolerance:
-                            # 右边框候选：线条应该在预测右边界的右方或略微左方（不超过表格宽度的1/4）
-                            max_left_offset = pred_width * 0.25  # 允许向左偏移表格宽度的1/4
-                            if x_pos >= pred_right - max_left_offset:
-                                candidates['right'].append((x_pos, right_distance, y_range))
-                            else:
-                                self._thread_safe_print(f"      跳过右边框候选: 线条位置过左 (x={x_pos:.1f}, 预测右边界={pred_right:.1f}, 最小允许={pred_right - max_left_offset:.1f})")
-                    else:
-                        self._thread_safe_print(f"      跳过垂直线: 重叠度不够 (重叠={overlap_height:.1f}, 需要={min_overlap_required:.1f}, 线条=[{y_range[0]:.1f},{y_range[1]:.1f}], 表格=[{pred_top:.1f},{pred_bottom:.1f}])")
-                
-                # 水平线条（可能是上下边框）
-                elif abs(start_y - end_y) <= 2:  # 水平线
-                    y_pos = (start_y + end_y) / 2
-                    x_range = [min(start_x, end_x), max(start_x, end_x)]
-                    
-                    # 检查是否与预测框的水平范围有足够重叠
-                    overlap_left = max(x_range[0], pred_left - tolerance)
-                    overlap_right = min(x_range[1], pred_right + tolerance)
-                    overlap_width = overlap_right - overlap_left
-                    
-                    # 要求至少50%的重叠度
-                    table_width = pred_right - pred_left
-                    line_width = x_range[1] - x_range[0]
-                    min_overlap_required = min(table_width * 0.5, line_width * 0.5)  # 取较小值作为最小重叠要求
-                    
-                    if overlap_width >= min_overlap_required:
-                        # 计算与上边框的距离（只考虑位置合理的线条）
-                        top_distance = abs(y_pos - pred_top)
-                        if top_distance <= tolerance:
-                            # 上边框候选：线条应该在预测上边界的上方或略微下方
-                            # 对于小高度表格（<75px），使用更大的宽容度
-                            if pred_height < 75.0:
-                                # 小高度表格：允许向下偏移更大的距离（表格高度的50%或最小30px）
-                                max_down_offset = max(pred_height * 0.85, 30.0)
-                                self._thread_safe_print(f"      🔍 小高度表格上边框搜索: 使用增强宽容度 {max_down_offset:.1f}px")
-                            else:
-                                # 标准表格：允许向下偏移表格高度的1/4
-                                max_down_offset = pred_height * 0.25
-                            
-                            if y_pos <= pred_top + max_down_offset:
-                                candidates['top'].append((y_pos, top_distance, x_range))
-                                self._thread_safe_print(f"      ✅ 上边框候选: y={y_pos:.1f}, 距离={top_distance:.1f}, 重叠度={overlap_width:.1f}/{min_overlap_required:.1f}, 线条范围=[{x_range[0]:.1f}, {x_range[1]:.1f}]")
-                            else:
-                                self._thread_safe_print(f"      跳过上边框候选: 线条位置过低 (y={y_pos:.1f}, 预测上边界={pred_top:.1f}, 最大允许={pred_top + max_down_offset:.1f})")
-                        
-                        # 计算与下边框的距离（只考虑位置合理的线条）
-                        bottom_distance = abs(y_pos - pred_bottom)
-                        if bottom_distance <= tolerance:
-                            # 下边框候选：线条应该在预测下边界的下方或略微上方
-                            # 对于小高度表格（<75px），使用更大的宽容度
-                            if pred_height < 75.0:
-                                # 小高度表格：允许向上偏移更大的距离（表格高度的50%或最小30px）
-                                max_up_offset = max(pred_height * 0.5, 30.0)
-                                self._thread_safe_print(f"      🔍 小高度表格下边框搜索: 使用增强宽容度 {max_up_offset:.1f}px")
-                            else:
-                                # 标准表格：允许向上偏移表格高度的1/4
-                                max_up_offset = pred_height * 0.25
-                            
-                            if y_pos >= pred_bottom - max_up_offset:
-                                candidates['bottom'].append((y_pos, bottom_distance, x_range))
-                            else:
-                                self._thread_safe_print(f"      跳过下边框候选: 线条位置过高 (y={y_pos:.1f}, 预测下边界={pred_bottom:.1f}, 最小允许={pred_bottom - max_up_offset:.1f})")
-                    else:
-                        self._thread_safe_print(f"      跳过水平线: 重叠度不够 (重叠={overlap_width:.1f}, 需要={min_overlap_required:.1f}, 线条=[{x_range[0]:.1f},{x_range[1]:.1f}], 表格=[{pred_left:.1f},{pred_right:.1f}])")
-            
-            elif line['type'] == 'rect':
-                # 矩形边框 - 检查是否完全匹配
-                rect_x1, rect_y1, rect_x2, rect_y2 = line_bbox
-                
-                if (abs(pred_left - rect_x1) <= tolerance and abs(pred_top - rect_y1) <= tolerance and
-                    abs(pred_right - rect_x2) <= tolerance and abs(pred_bottom - rect_y2) <= tolerance):
-                    self._thread_safe_print(f"    📐 找到完整匹配的矩形边框")
-                    return [rect_x1, rect_y1, rect_x2, rect_y2]
+        # 对所有线条批量计算候选条件（逐线条的判定与日志顺序保持不变）
+        start_x, start_y, end_x, end_y = coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3]
+        is_line = ~is_rect
+        vertical = is_line & (np.abs(start_x - end_x) <= 2)  # 垂直线（可能是左右边框）
+        flat = is_line & (np.abs(start_y - end_y) <= 2)
+        horizontal = flat & ~vertical  # 水平线（可能是上下边框），长度很短的线条按垂直线处理
+        
+        # 矩形边框 - 检查是否完全匹配，第一个完全匹配的矩形之后的线条不再参与判定
+        rect_match = (is_rect & (np.abs(pred_left - start_x) <= tolerance) & (np.abs(pred_top - start_y) <= tolerance) &
+                      (np.abs(pred_right - end_x) <= tolerance) & (np.abs(pred_bottom - end_y) <= tolerance))
+        matched_rects = np.flatnonzero(rect_match)
+        if len(matched_rects):
+            considered = np.arange(len(coords)) < matched_rects[0]
+            vertical &= considered
+            horizontal &= considered
+        
+        # 垂直线：要求与预测框的垂直范围至少50%重叠（取表格与线条高度一半的较小值作为最小重叠要求）
+        x_pos = (start_x + end_x) / 2
+        y_start = np.minimum(start_y, end_y)
+        y_end = np.maximum(start_y, end_y)
+        overlap_height = np.minimum(y_end, pred_bottom + tolerance) - np.maximum(y_start, pred_top - tolerance)
+        min_overlap_height = np.minimum(pred_height * 0.5, (y_end - y_start) * 0.5)
+        vertical_overlapping = vertical & (overlap_height >= min_overlap_height)
+        
+        # 左边框候选：线条应该在预测左边界的左方或略微右方（不超过表格宽度的1/4）
+        left_distance = np.abs(x_pos - pred_left)
+        left_near = vertical_overlapping & (left_distance <= tolerance)
+        max_right_offset = pred_width * 0.25
+        left_valid = left_near & (x_pos <= pred_left + max_right_offset)
+        
+        # 右边框候选：线条应该在预测右边界的右方或略微左方（不超过表格宽度的1/4）
+        right_distance = np.abs(x_pos - pred_right)
+        right_near = vertical_overlapping & (right_distance <= tolerance)
+        max_left_offset = pred_width * 0.25
+        right_valid = right_near & (x_pos >= pred_right - max_left_offset)
+        
+        # 水平线：要求与预测框的水平范围至少50%重叠
+        y_pos = (start_y + end_y) / 2
+        x_start = np.minimum(start_x, end_x)
+        x_end = np.maximum(start_x, end_x)
+        overlap_width = np.minimum(x_end, pred_right + tolerance) - np.maximum(x_start, pred_left - tolerance)
+        min_overlap_width = np.minimum(pred_width * 0.5, (x_end - x_start) * 0.5)
+        width_overlapping = overlap_width >= min_overlap_width
+        horizontal_overlapping = horizontal & width_overlapping
+        
+        # 上下边框允许的偏移：小高度表格（<75px）使用更大的宽容度，标准表格允许偏移表格高度的1/4
+        if is_small_height_table:
+            max_down_offset = max(pred_height * 0.85, 30.0)
+            max_up_offset = max(pred_height * 0.5, 30.0)
+        else:
+            max_down_offset = pred_height * 0.25
+            max_up_offset = pred_height * 0.25
         
-        # 显示边框候选统计
-        candidate_counts = {
-            'left': len(candidates['left']),
-            'right': len(candidates['right']),
-            'top': len(candidates['top']),
-            'bottom': len(candidates['bottom'])
+        # 上边框候选：线条应该在预测上边界的上方或略微下方
+        top_distance = np.abs(y_pos - pred_top)
+        top_near = horizontal_overlapping & (top_distance <= tolerance)
+        top_valid = top_near & (y_pos <= pred_top + max_down_offset)
+        
+        # 下边框候选：线条应该在预测下边界的下方或略微上方
+        bottom_distance = np.abs(y_pos - pred_bottom)
+        bottom_near = horizontal_overlapping & (bottom_distance <= tolerance)
+        bottom_valid = bottom_near & (y_pos >= pred_bottom - max_up_offset)
+        
+        # 候选按线条原始顺序排列，后续按距离稳定排序时与逐条遍历的结果一致
+        candidates = {
+            'left': self._collect_border_candidates(left_valid, x_pos, left_distance, y_start, y_end),        # [(x_pos, distance, y_range)]
+            'right': self._collect_border_candidates(right_valid, x_pos, right_distance, y_start, y_end),     # [(x_pos, distance, y_range)]
+            'top': self._collect_border_candidates(top_valid, y_pos, top_distance, x_start, x_end),           # [(y_pos, distance, x_range)]
+            'bottom': self._collect_border_candidates(bottom_valid, y_pos, bottom_distance, x_start, x_end)   # [(y_pos, distance, x_range)]
         }
-        self._thread_safe_print(f"    📊 边框候选统计: 左={candidate_counts['left']}, 右={candidate_counts['right']}, 上={candidate_counts['top']}, 下={candidate_counts['bottom']}")
+        
+        if self.verbose:
+            # 按线条顺序输出逐条判定日志
+            messages = []
+            for i in np.flatnonzero(vertical & ~vertical_overlapping):
+                messages.append((i, 0, f"      跳过垂直线: 重叠度不够 (重叠={overlap_height[i]:.1f}, 需要={min_overlap_height[i]:.1f}, 线条=[{y_start[i]:.1f},{y_end[i]:.1f}], 表格=[{pred_top:.1f},{pred_bottom:.1f}])"))
+            for i in np.flatnonzero(left_near & ~left_valid):
+                messages.append((i, 1, f"      跳过左边框候选: 线条位置过右 (x={x_pos[i]:.1f}, 预测左边界={pred_left:.1f}, 最大允许={pred_left + max_right_offset:.1f})"))
+            for i in np.flatnonzero(right_near & ~right_valid):
+                messages.append((i, 2, f"      跳过右边框候选: 线条位置过左 (x={x_pos[i]:.1f}, 预测右边界={pred_right:.1f}, 最小允许={pred_right - max_left_offset:.1f})"))
+            for i in np.flatnonzero(horizontal & ~horizontal_overlapping):
+                messages.append((i, 0, f"      跳过水平线: 重叠度不够 (重叠={overlap_width[i]:.1f}, 需要={min_overlap_width[i]:.1f}, 线条=[{x_start[i]:.1f},{x_end[i]:.1f}], 表格=[{pred_left:.1f},{pred_right:.1f}])"))
+            for i in np.flatnonzero(top_near):
+                if is_small_height_table:
+                    messages.append((i, 1, f"      🔍 小高度表格上边框搜索: 使用增强宽容度 {max_down_offset:.1f}px"))
+                if top_valid[i]:
+                    messages.append((i, 2, f"      ✅ 上边框候选: y={y_pos[i]:.1f}, 距离={top_distance[i]:.1f}, 重叠度={overlap_width[i]:.1f}/{min_overlap_width[i]:.1f}, 线条范围=[{x_start[i]:.1f}, {x_end[i]:.1f}]"))
+                else:
+                    messages.append((i, 2, f"      跳过上边框候选: 线条位置过低 (y={y_pos[i]:.1f}, 预测上边界={pred_top:.1f}, 最大允许={pred_top + max_down_offset:.1f})"))
+            for i in np.flatnonzero(bottom_near):
+                if is_small_height_table:
+                    messages.append((i, 3, f"      🔍 小高度表格下边框搜索: 使用增强宽容度 {max_up_offset:.1f}px"))
+                if not bottom_valid[i]:
+                    messages.append((i, 4, f"      跳过下边框候选: 线条位置过高 (y={y_pos[i]:.1f}, 预测下边界={pred_bottom:.1f}, 最小允许={pred_bottom - max_up_offset:.1f})"))
+            messages.sort(key=lambda message: (message[0], message[1]))
+            for _, _, message in messages:
+                self._thread_safe_print(message)
+        
+        if len(matched_rects):
+            self._thread_safe_print(f"    📐 找到完整匹配的矩形边框")
+            return coords[matched_rects[0]].tolist()
+        
+        # 显示边框候选统计
+        if self.verbose:
+            candidate_counts = {
+                'left': len(candidates['left']),
+                'right': len(candidates['right']),
+                'top': len(candidates['top']),
+                'bottom': len(candidates['bottom'])
+            }
+            self._thread_safe_print(f"    📊 边框候选统计: 左={candidate_counts['left']}, 右={candidate_counts['right']}, 上={candidate_counts['top']}, 下={candidate_counts['bottom']}")
         
         # 从候选线条中选择最近的边框
         refined_coords = [pred_left, pred_top, pred_right, pred_bottom]
         found_borders = {'left': False, 'top': False, 'right': False, 'bottom': False}
+        best_candidates = {}  # 各边选中的候选线条
         refinement_details = []
         
-        # 小高度表格的特殊处理逻辑
-        if is_small_height_table:
+        # 各边在refined_coords中的索引、预测值和说明（按上、下、左、右的顺序处理）
+        side_specs = (('top', 1, pred_top, '上边框'), ('bottom', 3, pred_bottom, '下边框'),
+                      ('left', 0, pred_left, '左边框'), ('right', 2, pred_right, '右边框'))
+        
+        # 小高度表格的特殊处理逻辑：找到上边框时优先确定上边框，再按原始高度平移搜索下边框
+        if is_small_height_table and candidates['top']:
             # 1. 优先处理上边框
-            if candidates['top']:
-                candidates['top'].sort(key=lambda x: x[1])
-                best_top = candidates['top'][0]
-                refined_coords[1] = best_top[0]  # y坐标
-                found_borders['top'] = True
-                refinement_details.append(f"上边框(优先): {pred_top:.1f} → {best_top[0]:.1f} (距离: {best_top[1]:.1f})")
-                
-                # 2. 基于上边框位置和原始高度计算下边框目标位置
-                target_bottom = refined_coords[1] + pred_height
-                self._thread_safe_print(f"      基于上边框和原始高度计算下边框目标位置: {target_bottom:.1f}")
-                
-                # 3. 重新搜索下边框，使用更小的容忍度在目标位置附近查找
-                adjusted_bottom_candidates = []
-                small_tolerance = min(tolerance * 0.99, 30.0)  # 使用更小的容忍度
-                
-                for line in page_lines:
-                    if line['type'] == 'line':
-                        start_x, start_y = line['start']
-                        end_x, end_y = line['end']
-                        
-                        # 水平线条（可能是下边框）
-                        if abs(start_y - end_y) <= 2:  # 水平线
-                            y_pos = (start_y + end_y) / 2
-                            x_range = [min(start_x, end_x), max(start_x, end_x)]
-                            
-                            # 检查是否与预测框的水平范围有重叠，且在目标下边框位置附近
-                            overlap_left = max(x_range[0], pred_left - tolerance)
-                            overlap_right = min(x_range[1], pred_right + tolerance)
-                            overlap_width = overlap_right - overlap_left
-                            
-                            # 要求至少50%的重叠度
-                            table_width = pred_right - pred_left
-                            line_width = x_range[1] - x_range[0]
-                            min_overlap_required = min(table_width * 0.5, line_width * 0.5)
-                            
-                            if overlap_width >= min_overlap_required:
-                                # 计算与目标下边框的距离（加入位置合理性检查）
-                                bottom_distance = abs(y_pos - target_bottom)
-                                if bottom_distance <= small_tolerance:
-                                    # 对于小高度表格的下边框搜索，使用增强宽容度
-                                    max_up_offset = max(pred_height * 0.5, 30.0)  # 允许向上偏移更大的距离（原始高度的50%或最小30px）
-                                    self._thread_safe_print(f"      🔍 小高度表格下边框重新搜索: 使用增强宽容度 {max_up_offset:.1f}px")
-                                    if y_pos >= target_bottom - max_up_offset:
-                                        adjusted_bottom_candidates.append((y_pos, bottom_distance, x_range))
-                                    else:
-                                        self._thread_safe_print(f"      跳过小高度表格下边框候选: 线条位置过高 (y={y_pos:.1f}, 目标下边界={target_bottom:.1f}, 最小允许={target_bottom - max_up_offset:.1f})")
-                            else:
-                                self._thread_safe_print(f"      跳过小高度表格水平线: 重叠度不够 (重叠={overlap_width:.1f}, 需要={min_overlap_required:.1f})")
-                
-                # 从调整后的候选中选择最近的下边框
-                if adjusted_bottom_candidates:
-                    adjusted_bottom_candidates.sort(key=lambda x: x[1])
-                    best_bottom = adjusted_bottom_candidates[0]
-                    refined_coords[3] = best_bottom[0]  # y坐标
-                    found_borders['bottom'] = True
-                    refinement_details.append(f"下边框(平移搜索): {pred_bottom:.1f} → {target_bottom:.1f} → {best_bottom[0]:.1f} (距离: {best_bottom[1]:.1f})")
-                else:
-                    # 如果找不到合适的下边框，使用原始计算位置
-                    refined_coords[3] = target_bottom
-                    found_borders['bottom'] = True  # 标记为已处理，虽然是计算得出的
-                    refinement_details.append(f"下边框(保持计算): {pred_bottom:.1f} → {target_bottom:.1f} (基于上边框+原始高度)")
+            best_top = best_candidates['top'] = min(candidates['top'], key=itemgetter(1))
+            refined_coords[1] = best_top[0]  # y坐标
+            found_borders['top'] = True
+            refinement_details.append(f"上边框(优先): {pred_top:.1f} → {best_top[0]:.1f} (距离: {best_top[1]:.1f})")
+            
+            # 2. 基于上边框位置和原始高度计算下边框目标位置
+            target_bottom = refined_coords[1] + pred_height
+            self._thread_safe_print(f"      基于上边框和原始高度计算下边框目标位置: {target_bottom:.1f}")
+            
+            # 3. 重新搜索下边框，使用更小的容忍度在目标位置附近查找
+            small_tolerance = min(tolerance * 0.99, 30.0)  # 使用更小的容忍度
+            
+            # 复用第一遍的水平重叠判定，只需计算与目标下边框的距离（此处长度很短的线条也视为水平线）
+            adjusted_overlapping = flat & width_overlapping
+            adjusted_distance = np.abs(y_pos - target_bottom)
+            adjusted_near = adjusted_overlapping & (adjusted_distance <= small_tolerance)
+            # 对于小高度表格的下边框搜索，使用增强宽容度（原始高度的50%或最小30px）
+            adjusted_max_up_offset = max(pred_height * 0.5, 30.0)
+            adjusted_valid = adjusted_near & (y_pos >= target_bottom - adjusted_max_up_offset)
+            adjusted_bottom_candidates = self._collect_border_candidates(
+                adjusted_valid, y_pos, adjusted_distance, x_start, x_end
+            )
             
+            if self.verbose:
+                messages = []
+                for i in np.flatnonzero(flat & ~width_overlapping):
+                    messages.append((i, 0, f"      跳过小高度表格水平线: 重叠度不够 (重叠={overlap_width[i]:.1f}, 需要={min_overlap_width[i]:.1f})"))
+                for i in np.flatnonzero(adjusted_near):
+                    messages.append((i, 0, f"      🔍 小高度表格下边框重新搜索: 使用增强宽容度 {adjusted_max_up_offset:.1f}px"))
+                    if not adjusted_valid[i]:
+                        messages.append((i, 1, f"      跳过小高度表格下边框候选: 线条位置过高 (y={y_pos[i]:.1f}, 目标下边界={target_bottom:.1f}, 最小允许={target_bottom - adjusted_max_up_offset:.1f})"))
+                messages.sort(key=lambda message: (message[0], message[1]))
+                for _, _, message in messages:
+                    self._thread_safe_print(message)
+            
+            # 从调整后的候选中选择最近的下边框
+            if adjusted_bottom_candidates:
+                best_bottom = min(adjusted_bottom_candidates, key=itemgetter(1))
+                refined_coords[3] = best_bottom[0]  # y坐标
+                found_borders['bottom'] = True
+                refinement_details.append(f"下边框(平移搜索): {pred_bottom:.1f} → {target_bottom:.1f} → {best_bottom[0]:.1f} (距离: {best_bottom[1]:.1f})")
             else:
+                # 如果找不到合适的下边框，使用原始计算位置
+                refined_coords[3] = target_bottom
+                found_borders['bottom'] = True  # 标记为已处理，虽然是计算得出的
+                refinement_details.append(f"下边框(保持计算): {pred_bottom:.1f} → {target_bottom:.1f} (基于上边框+原始高度)")
+            
+            standard_sides = side_specs[2:]
+        else:
+            if is_small_height_table:
                 # 如果没有找到上边框，回退到标准处理
                 self._thread_safe_print(f"      未找到上边框，回退到标准处理模式")
-                # 处理上边框
-                if candidates['top']:
-                    candidates['top'].sort(key=lambda x: x[1])
-                    best_top = candidates['top'][0]
-                    refined_coords[1] = best_top[0]  # y坐标
-                    found_borders['top'] = True
-                    refinement_details.append(f"上边框: {pred_top:.1f} → {best_top[0]:.1f} (距离: {best_top[1]:.1f})")
-                
-                # 处理下边框
-                if candidates['bottom']:
-                    candidates['bottom'].sort(key=lambda x: x[1])
-                    best_bottom = candidates['bottom'][0]
-                    refined_coords[3] = best_bottom[0]  # y坐标
-                    found_borders['bottom'] = True
-                    refinement_details.append(f"下边框: {pred_bottom:.1f} → {best_bottom[0]:.1f} (距离: {best_bottom[1]:.1f})")
+            standard_sides = side_specs
         
-        else:
-            # 标准高度表格的正常处理
-            # 处理上边框
-            if candidates['top']:
-                candidates['top'].sort(key=lambda x: x[1])
-                best_top = candidates['top'][0]
-                refined_coords[1] = best_top[0]  # y坐标
-                found_borders['top'] = True
-                refinement_details.append(f"上边框: {pred_top:.1f} → {best_top[0]:.1f} (距离: {best_top[1]:.1f})")
-            
-            # 处理下边框
-            if candidates['bottom']:
-                candidates['bottom'].sort(key=lambda x: x[1])
-                best_bottom = candidates['bottom'][0]
-                refined_coords[3] = best_bottom[0]  # y坐标
-                found_borders['bottom'] = True
-                refinement_details.append(f"下边框: {pred_bottom:.1f} → {best_bottom[0]:.1f} (距离: {best_bottom[1]:.1f})")
-        
-        # 左右边框处理（对所有表格都相同）
-        # 处理左边框
-        if candidates['left']:
-            # 按距离排序，选择最近的
-            candidates['left'].sort(key=lambda x: x[1])
-            best_left = candidates['left'][0]
-            refined_coords[0] = best_left[0]  # x坐标
-            found_borders['left'] = True
-            refinement_details.append(f"左边框: {pred_left:.1f} → {best_left[0]:.1f} (距离: {best_left[1]:.1f})")
-        
-        # 处理右边框
-        if candidates['right']:
-            candidates['right'].sort(key=lambda x: x[1])
-            best_right = candidates['right'][0]
-            refined_coords[2] = best_right[0]  # x坐标
-            found_borders['right'] = True
-            refinement_details.append(f"右边框: {pred_right:.1f} → {best_right[0]:.1f} (距离: {best_right[1]:.1f})")
+        # 标准处理：各边选择距离最近的候选线条（距离相同时取线条顺序靠前的）
+        for side, index, pred_value, label in standard_sides:
+            side_candidates = candidates[side]
+            if side_candidates:
+                best = best_candidates[side] = min(side_candidates, key=itemgetter(1))
+                refined_coords[index] = best[0]
+                found_borders[side] = True
+                refinement_details.append(f"{label}: {pred_value:.1f} → {best[0]:.1f} (距离: {best[1]:.1f})")
         
         # 根据找到的边框线的两端坐标进行坐标修正
         coordinate_adjustments = []
@@ -524,11 +1160,11 @@ class PDFBboxExtractor:
         primary_horizontal_type = None
         
         if found_borders['top']:
-            top_info = candidates['top'][0]
+            top_info = best_candidates['top']
             primary_horizontal_range = top_info[2]  # [x_start, x_end]
             primary_horizontal_type = "上边框"
         elif found_borders['bottom']:
-            bottom_info = candidates['bottom'][0]
+            bottom_info = best_candidates['bottom']
             primary_horizontal_range = bottom_info[2]  # [x_start, x_end]
             primary_horizontal_type = "下边框"
         
@@ -541,12 +1177,13 @@ class PDFBboxExtractor:
             left_adjustment = abs(line_left - refined_coords[0])
             right_adjustment = abs(line_right - refined_coords[2])
             
-            # 添加调试输出
-            self._thread_safe_print(f"      🔍 水平线端点分析:")
-            self._thread_safe_print(f"        {primary_horizontal_type}端点: [{line_left:.1f}, {line_right:.1f}]")
-            self._thread_safe_print(f"        当前坐标: 左={refined_coords[0]:.1f}, 右={refined_coords[2]:.1f}")
-            self._thread_safe_print(f"        修正幅度: 左={left_adjustment:.1f}px, 右={right_adjustment:.1f}px")
-            self._thread_safe_print(f"        垂直边框状态: 左={found_borders['left']}, 右={found_borders['right']}")
+            # 添加调试输出（不输出日志时跳过格式化）
+            if self.verbose:
+                self._thread_safe_print(f"      🔍 水平线端点分析:")
+                self._thread_safe_print(f"        {primary_horizontal_type}端点: [{line_left:.1f}, {line_right:.1f}]")
+                self._thread_safe_print(f"        当前坐标: 左={refined_coords[0]:.1f}, 右={refined_coords[2]:.1f}")
+                self._thread_safe_print(f"        修正幅度: 左={left_adjustment:.1f}px, 右={right_adjustment:.1f}px")
+                self._thread_safe_print(f"        垂直边框状态: 左={found_borders['left']}, 右={found_borders['right']}")
             
             # 修正左边界（如果没有找到垂直左边框，且修正幅度合理）
             if not found_borders['left'] and left_adjustment <= 30.0:
@@ -586,10 +1223,10 @@ class PDFBboxExtractor:
         # 2. 如果找到垂直边框（左/右），使用其垂直范围修正上下边界
         vertical_y_ranges = []
         if found_borders['left']:
-            left_info = candidates['left'][0]
+            left_info = best_candidates['left']
             vertical_y_ranges.append(left_info[2])  # [y_start, y_end]
         if found_borders['right']:
-            right_info = candidates['right'][0]
+            right_info = best_candidates['right']
             vertical_y_ranges.append(right_info[2])  # [y_start, y_end]
         
         if vertical_y_ranges:
@@ -615,16 +1252,17 @@ class PDFBboxExtractor:
         alignment_adjustments = []
         if found_borders['top'] and found_borders['left'] and found_borders['right']:
             # 上边框应该与左右边框的x坐标对齐
-            top_info = candidates['top'][0]
+            top_info = best_candidates['top']
             top_x_range = top_info[2]
             if abs(top_x_range[0] - refined_coords[0]) > 3:
                 alignment_adjustments.append(f"上边框左端对齐: {top_x_range[0]:.1f} → {refined_coords[0]:.1f}")
             if abs(top_x_range[1] - refined_coords[2]) > 3:
                 alignment_adjustments.append(f"上边框右端对齐: {top_x_range[1]:.1f} → {refined_coords[2]:.1f}")
         
-        if found_borders['bottom'] and found_borders['left'] and found_borders['right']:
-            # 下边框应该与左右边框的x坐标对齐
-            bottom_info = candidates['bottom'][0]
+        # 小高度表格的下边框可能由上边框平移得出，此时没有对应的候选线条
+        if found_borders['bottom'] and found_borders['left'] and found_borders['right'] and candidates['bottom']:
+            # 下边框应该与左右边框的x坐标对齐（平移搜索得到的下边框不在候选中，沿用第一条候选线条）
+            bottom_info = best_candidates['bottom'] if 'bottom' in best_candidates else candidates['bottom'][0]
             bottom_x_range = bottom_info[2]
             if abs(bottom_x_range[0] - refined_coords[0]) > 3:
                 alignment_adjustments.append(f"下边框左端对齐: {bottom_x_range[0]:.1f} → {refined_coords[0]:.1f}")
@@ -634,37 +1272,60 @@ class PDFBboxExtractor:
         # 合并所有调整信息
         all_adjustments = refinement_details + coordinate_adjustments + alignment_adjustments
         
-        # 确保坐标顺序正确
-        if refined_coords[0] > refined_coords[2]:  # left > right
-            refined_coords[0], refined_coords[2] = refined_coords[2], refined_coords[0]
-        if refined_coords[1] > refined_coords[3]:  # top > bottom
-            refined_coords[1], refined_coords[3] = refined_coords[3], refined_coords[1]
+        # 确保坐标顺序正确（left <= right, top <= bottom）
+        x0, y0, x1, y1 = refined_coords
+        refined_coords = [min(x0, x1), min(y0, y1), max(x1, x0), max(y1, y0)]
         
         # 检查是否找到了足够的边框（至少2个边）
         found_count = sum(found_borders.values())
         if found_count >= 2:
-            final_height = refined_coords[3] - refined_coords[1]
-            height_change = final_height - pred_height
-            
-            if is_small_height_table:
-                self._thread_safe_print(f"    📐 小高度表格修正完成: 找到 {found_count} 个边框 (高度: {pred_height:.1f} → {final_height:.1f}, 变化: {height_change:+.1f})")
-            else:
-                self._thread_safe_print(f"    📐 修正边框: 找到 {found_count} 个匹配的边框线")
-            
-            for detail in all_adjustments[:4]:  # 显示前4项调整
-                self._thread_safe_print(f"      - {detail}")
-            if len(all_adjustments) > 4:
-                self._thread_safe_print(f"      - ... 等 {len(all_adjustments)} 项调整")
+            if self.verbose:
+                final_height = refined_coords[3] - refined_coords[1]
+                height_change = final_height - pred_height
+                
+                if is_small_height_table:
+                    self._thread_safe_print(f"    📐 小高度表格修正完成: 找到 {found_count} 个边框 (高度: {pred_height:.1f} → {final_height:.1f}, 变化: {height_change:+.1f})")
+                else:
+                    self._thread_safe_print(f"    📐 修正边框: 找到 {found_count} 个匹配的边框线")
+                
+                for detail in all_adjustments[:4]:  # 显示前4项调整
+                    self._thread_safe_print(f"      - {detail}")
+                if len(all_adjustments) > 4:
+                    self._thread_safe_print(f"      - ... 等 {len(all_adjustments)} 项调整")
             return refined_coords
         
         return None
     
+    def _collect_border_candidates(self, mask: np.ndarray, positions: np.ndarray, distances: np.ndarray,
+                                   range_starts: np.ndarray, range_ends: np.ndarray) -> List[Tuple[float, float, List[float]]]:
+        """
+        按线条顺序收集满足条件的边框候选
+        
+        Args:
+            mask: 候选线条掩码
+            positions: 线条位置（垂直线为x坐标，水平线为y坐标）
+            distances: 线条与对应预测边界的距离
+            range_starts: 线条范围起点
+            range_ends: 线条范围终点
+            
+        Returns:
+            候选列表 [(位置, 距离, [范围起点, 范围终点])]
+        """
+        indices = np.flatnonzero(mask)
+        return [
+            (position, distance, [range_start, range_end])
+            for position, distance, range_start, range_end in zip(
+                positions[indices].tolist(), distances[indices].tolist(),
+                range_starts[indices].tolist(), range_ends[indices].tolist()
+            )
+        ]
+    
     def _refine_table_predictions(self, tables: List[Dict[str, Any]], page: fitz.Page) -> List[Dict[str, Any]]:
         """
         根据页面中的实际线条修正表格预测框
         
         Args:
-            tables: 原始表格预测列表
+            tables: 原始表格预测列表（原地更新）
             page: PyMuPDF页面对象
             
         Returns:
@@ -673,37 +1334,66 @@ class PDFBboxExtractor:
         if not tables:
             return tables
         
-        # 提取页面中的线条
+        # 提取页面中的线条（每页只提取一次，所有表格共用）
         page_lines = self._extract_page_lines(page)
-        if not page_lines:
+        if len(page_lines[0]) == 0:
             self._thread_safe_print(f"  📐 未找到页面线条，保持原始预测框")
             return tables
         
-        self._thread_safe_print(f"  📐 找到 {len(page_lines)} 个页面线条，开始修正表格边框...")
+        self._thread_safe_print(f"  📐 找到 {len(page_lines[0])} 个页面线条，开始修正表格边框...")
         
-        refined_tables = []
+        # 直接在原表格字典上更新（预测框列表不会被修改，修正结果为新列表），无需复制
         for i, table in enumerate(tables):
-            original_bbox = table['bbox'].copy()
+            original_bbox = table['bbox']
             
             # 查找最近的边框线
             refined_bbox = self._find_nearest_table_borders(original_bbox, page_lines, tolerance=30.0)
             
             if refined_bbox:
                 # 更新表格信息
-                refined_table = table.copy()
-                refined_table['bbox'] = refined_bbox
-                refined_table['rect'] = fitz.Rect(refined_bbox)
-                refined_table['refined'] = True
-                refined_tables.append(refined_table)
+                table['bbox'] = refined_bbox
+                table['refined'] = True
                 
-                self._thread_safe_print(f"    ✅ 表格 {i+1} 边框已修正: {[round(x, 1) for x in original_bbox]} → {[round(x, 1) for x in refined_bbox]}")
+                if self.verbose:
+                    self._thread_safe_print(f"    ✅ 表格 {i+1} 边框已修正: {[round(x, 1) for x in original_bbox]} → {[round(x, 1) for x in refined_bbox]}")
             else:
                 # 保持原始预测框
                 table['refined'] = False
-                refined_tables.append(table)
-                self._thread_safe_print(f"    ⚪ 表格 {i+1} 保持原始边框: {[round(x, 1) for x in original_bbox]} (未找到匹配线条)")
+                if self.verbose:
+                    self._thread_safe_print(f"    ⚪ 表格 {i+1} 保持原始边框: {[round(x, 1) for x in original_bbox]} (未找到匹配线条)")
         
-        return refined_tables
+        return tables
+    
+    def _cached_inference(self, response_cache: Optional[_ResponseCache], image_data: Optional[bytes],
+                          **request: Any) -> str:
+        """
+        调用模型API，相同图片和请求参数的响应从缓存读取（重复运行或内容相同的页面无需再次请求）
+        
+        Args:
+            response_cache: 模型API响应缓存，为None时直接调用
+            image_data: 上传的图片字节，为None时（从文件读取图片）不使用缓存
+            **request: inference_with_api的参数
+            
+        Returns:
+            模型输出内容
+        """
+        from utils.html_parser import inference_with_api
+        
+        request_key = None
+        if response_cache is not None and image_data is not None:
+            request_key = _vlm_request_key(
+                image_data, request['prompt'], request.get('sys_prompt'), request.get('model_id'),
+                request['min_pixels'], request['max_pixels']
+            )
+            cached = response_cache.get_response(request_key)
+            if cached is not None:
+                self._thread_safe_print(f"      💾 模型响应缓存命中")
+                return cached
+        
+        result = inference_with_api(**request)
+        if request_key is not None and result:
+            response_cache.put_response(request_key, result)
+        return result
     
     def _smart_resize(self, height: int, width: int, min_pixels: int = 512*28*28, max_pixels: int = 2048*28*28) -> Tuple[int, int]:
         """
@@ -719,57 +1409,58 @@ class PDFBboxExtractor:
         Returns:
             (input_height, input_width): 模型输入尺寸
         """
-        pixels = height * width
-        
-        if pixels < min_pixels:
-            # 需要放大
-            scale = math.sqrt(min_pixels / pixels)
-            input_height = int(height * scale)
-            input_width = int(width * scale)
-        elif pixels > max_pixels:
-            # 需要缩小
-            scale = math.sqrt(max_pixels / pixels)
-            input_height = int(height * scale)
-            input_width = int(width * scale)
-        else:
-            # 尺寸合适，不需要调整
-            input_height = height
-            input_width = width
-        
-        # 确保尺寸是28的倍数（Qwen2.5-VL的patch size）
-        input_height = ((input_height + 27) // 28) * 28
-        input_width = ((input_width + 27) // 28) * 28
-        
-        return input_height, input_width
+        return _smart_resize(height, width, min_pixels, max_pixels)
     
-    def extract_text_blocks(self, page: fitz.Page, tables: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def extract_text_blocks(self, page: fitz.Page, tables: List[Dict[str, Any]] = None,
+                            blocks: Optional[List[Dict[str, Any]]] = None,
+                            with_content: bool = True) -> List[Dict[str, Any]]:
         """
         提取页面中的文本块
         
         Args:
             page: PyMuPDF页面对象
             tables: 表格信息列表（用于避免合并表格附近的文本块）
+            blocks: 已解析的页面块（page.get_text("dict")["blocks"]），未提供时重新解析页面
+            with_content: 是否生成文本内容；为False时文本块只保留原始块引用（'_blocks'），
+                由调用方在过滤后调用_fill_text_block_contents生成
             
         Returns:
             文本块信息列表
         """
         text_blocks = []
-        text_instances = page.get_text("dict")["blocks"]
+        if blocks is None:
+            blocks = page.get_text("dict")["blocks"]
         
-        for block in text_instances:
+        for block in blocks:
             if block["type"] == 0:  # 0 代表文本块
                 text_blocks.append({
                     'type': 'text',
                     'bbox': block["bbox"],
-                    'content': self._extract_block_text(block),
-                    'rect': fitz.Rect(block["bbox"])
+                    '_blocks': [block]
                 })
         
         # 合并重叠或间距小于5px的文本块（但不合并距离表格5px内的文本块）
         merged_text_blocks = self._merge_text_blocks(text_blocks, tables or [])
         
+        if with_content:
+            self._fill_text_block_contents(merged_text_blocks)
+        
         return merged_text_blocks
     
+    def _fill_text_block_contents(self, text_blocks: List[Dict[str, Any]]) -> None:
+        """
+        由文本块记录的原始块生成文本内容（原地更新，并移除原始块引用）
+        
+        合并后的文本块按合并顺序以空格连接各原始块的文本（空文本不参与连接），
+        与逐次合并时拼接内容的结果相同
+        
+        Args:
+            text_blocks: extract_text_blocks(with_content=False)返回的文本块列表
+        """
+        for text_block in text_blocks:
+            contents = [self._extract_block_text(block) for block in text_block.pop('_blocks')]
+            text_block['content'] = " ".join(content for content in contents if content)
+    
     def _calculate_min_distance(self, bbox1: List[float], bbox2: List[float]) -> float:
         """
         计算两个矩形框之间的最小距离
@@ -888,13 +1579,11 @@ class PDFBboxExtractor:
                             max(bbox1[3], bbox2[3])   # max y2
                         ]
                         
-                        merged_content = merged_block['content'] + " " + block2['content']
-                        
+                        # 只记录原始块，文本内容在过滤后统一生成
                         merged_block = {
                             'type': 'text',
                             'bbox': merged_bbox,
-                            'content': merged_content.strip(),
-                            'rect': fitz.Rect(merged_bbox)
+                            '_blocks': merged_block['_blocks'] + block2['_blocks']
                         }
                         
                         bbox1 = merged_bbox  # 更新bbox1为合并后的框
@@ -913,12 +1602,13 @@ class PDFBboxExtractor:
         
         return current_blocks
     
-    def extract_images(self, page: fitz.Page) -> List[Dict[str, Any]]:
+    def extract_images(self, page: fitz.Page, blocks: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
         提取页面中的图像
         
         Args:
             page: PyMuPDF页面对象
+            blocks: 已解析的页面块（page.get_text("dict")["blocks"]），未提供时重新解析页面
             
         Returns:
             图像信息列表
@@ -927,15 +1617,15 @@ class PDFBboxExtractor:
         
         try:
             # 直接从页面块中提取图像块，避免重复
-            text_dict = page.get_text("dict")
-            image_blocks = [block for block in text_dict["blocks"] if block["type"] == 1]
+            if blocks is None:
+                blocks = page.get_text("dict")["blocks"]
+            image_blocks = [block for block in blocks if block["type"] == 1]
             
             for img_index, block in enumerate(image_blocks):
                 images.append({
                     'type': 'image',
                     'bbox': block["bbox"],
-                    'index': img_index,
-                    'rect': fitz.Rect(block["bbox"])
+                    'index': img_index
                 })
             
             # 去重：移除重叠的图像边框
@@ -973,14 +1663,14 @@ class PDFBboxExtractor:
                     if item[0] == "l":  # 线条
                         x1, y1 = item[1]
                         x2, y2 = item[2]
+                        bbox = [min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)]
                         original_lines.append({
                             'type': 'original_line',
                             'line_type': 'line',
-                            'bbox': [min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)],
+                            'bbox': bbox,
                             'start': [x1, y1],
                             'end': [x2, y2],
-                            'index': line_index,
-                            'rect': fitz.Rect([min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)])
+                            'index': line_index
                         })
                         line_index += 1
                     elif item[0] == "re":  # 矩形
@@ -989,8 +1679,7 @@ class PDFBboxExtractor:
                             'type': 'original_line',
                             'line_type': 'rectangle',
                             'bbox': [rect.x0, rect.y0, rect.x1, rect.y1],
-                            'index': line_index,
-                            'rect': fitz.Rect([rect.x0, rect.y0, rect.x1, rect.y1])
+                            'index': line_index
                         })
                         line_index += 1
             
@@ -1002,7 +1691,11 @@ class PDFBboxExtractor:
     
     def extract_tables_with_qwen(self, page_image_path: str, page_width: float, page_height: float, 
                                 image_width: int, image_height: int, model_id: str = "Qwen/Qwen2.5-VL-72B-Instruct", 
-                                max_retries: int = 3, retry_delay: float = 1.0) -> List[Dict[str, Any]]:
+                                max_retries: int = 3, retry_delay: float = 1.0, skip_precheck: bool = False,
+                                raise_errors: bool = False, retry_stats: Optional[Dict[str, int]] = None,
+                                image_data: Optional[bytes] = None,
+                                response_cache: Optional[_ResponseCache] = None,
+                                direct_detect: bool = False) -> List[Dict[str, Any]]:
         """
         使用Qwen2.5-VL提取表格边框
         
@@ -1014,59 +1707,79 @@ class PDFBboxExtractor:
             image_height: 图片高度
             max_retries: 最大重试次数
             retry_delay: 重试间隔（秒）
+            skip_precheck: 是否跳过预检查（批量网格预检查已确认存在表格）
+            raise_errors: API调用失败时是否抛出异常（默认只打印错误并返回空列表）
+            retry_stats: API重试统计字典（累加'retries'计数）
+            image_data: 内存中的页面JPEG字节；提供时不再读取page_image_path（路径仅用于命名标注图片）
+            response_cache: 模型API响应缓存；提供且有image_data时，相同图片和请求的响应直接从缓存读取
+            direct_detect: 是否不做预检查、直接用一次API调用检测表格（无表格时模型输出空数组）
             
         Returns:
             表格信息列表
         """
-        from utils.html_parser import inference_with_api
-        
         tables = []
+        spec = _get_model_spec(model_id)
+        # 图片只做一次base64编码，预检查和详细检测两次调用复用
+        image_base64 = base64.b64encode(image_data).decode("utf-8") if image_data is not None else None
         
         try:
-            # 第一步：预检查是否存在表格
-            check_prompt = "该图片是否有表格，请回答是或否"
-            check_sys_prompt = "You are an AI assistant. Please answer whether there are tables in the image with '是' (yes) or '否' (no)."
-            
-            self._thread_safe_print(f"    正在预检查是否存在表格...")
-            
-            # 调用API进行预检查
-            check_result = inference_with_api(
-                image_path=page_image_path,
-                prompt=check_prompt,
-                sys_prompt=check_sys_prompt,
-                model_id=model_id, 
-                max_retries=max_retries,
-                retry_delay=retry_delay
-            )
-            
-            # 判断是否包含表格
-            has_table = False
-            if check_result:
-                check_result_lower = check_result.lower().strip()
-                if '是' in check_result or 'yes' in check_result_lower or '有表格' in check_result:
-                    has_table = True
-                    self._thread_safe_print(f"      预检查结果: 检测到表格存在")
-                else:
-                    has_table = False
-                    self._thread_safe_print(f"      预检查结果: 未检测到表格")
-            
-            # 如果没有表格，直接返回空列表
-            if not has_table:
-                self._thread_safe_print(f"      跳过详细表格检测")
-                return tables
-            
+            # 第一步：预检查是否存在表格（批量网格预检查已确认或直接检测时跳过）
+            if direct_detect:
+                self._thread_safe_print(f"    跳过预检查，直接检测表格")
+            elif skip_precheck:
+                self._thread_safe_print(f"    批量预检查已确认存在表格")
+            else:
+                self._thread_safe_print(f"    正在预检查是否存在表格...")
+                
+                # 调用API进行预检查
+                check_result = self._cached_inference(
+                    response_cache,
+                    image_data,
+                    image_path=page_image_path,
+                    prompt=spec.check_prompt,
+                    sys_prompt=spec.check_sys_prompt,
+                    model_id=model_id, 
+                    min_pixels=spec.min_pixels,
+                    max_pixels=spec.max_pixels,
+                    max_retries=max_retries,
+                    retry_delay=retry_delay,
+                    retry_stats=retry_stats,
+                    image_base64=image_base64
+                )
+                
+                # 判断是否包含表格
+                has_table = False
+                if check_result:
+                    check_result_lower = check_result.lower().strip()
+                    if '是' in check_result or 'yes' in check_result_lower or '有表格' in check_result:
+                        has_table = True
+                        self._thread_safe_print(f"      预检查结果: 检测到表格存在")
+                    else:
+                        has_table = False
+                        self._thread_safe_print(f"      预检查结果: 未检测到表格")
+                
+                # 如果没有表格，直接返回空列表
+                if not has_table:
+                    self._thread_safe_print(f"      跳过详细表格检测")
+                    return tables
+                
             # 第二步：详细表格边框检测
             self._thread_safe_print(f"    正在进行详细表格边框检测...")
             
-            # 使用Qwen2.5-VL分析图片中的表格
-            prompt = "请定位图片中所有表格的位置，以JSON格式输出其bbox坐标"
-                        
             # 调用API获取表格检测结果
-            result = inference_with_api(
+            result = self._cached_inference(
+                response_cache,
+                image_data,
                 image_path=page_image_path,
-                prompt=prompt,
+                prompt=spec.direct_detect_prompt if direct_detect else spec.detect_prompt,
+                sys_prompt=spec.detect_sys_prompt,
+                model_id=model_id,
+                min_pixels=spec.min_pixels,
+                max_pixels=spec.max_pixels,
                 max_retries=max_retries,
-                retry_delay=retry_delay
+                retry_delay=retry_delay,
+                retry_stats=retry_stats,
+                image_base64=image_base64
             )
             
             # 解析JSON结果
@@ -1077,82 +1790,54 @@ class PDFBboxExtractor:
                 
                 if json_start != -1 and json_end > json_start:
                     json_str = result[json_start:json_end]
-                    detected_tables = json.loads(json_str)
+                    detected_tables = _loads_json(json_str)
                     
                     # 根据API参数计算模型输入尺寸
-                    min_pixels = 512*28*28
-                    max_pixels = 2048*28*28
-                    input_height, input_width = self._smart_resize(image_height, image_width, min_pixels, max_pixels)
+                    input_height, input_width = self._smart_resize(image_height, image_width, spec.min_pixels, spec.max_pixels)
                     
                     self._thread_safe_print(f"      原图尺寸: {image_width}x{image_height}, 模型输入尺寸: {input_width}x{input_height}")
                     
-                    for i, table_data in enumerate(detected_tables):
-                        if 'bbox_2d' in table_data:
-                            # Qwen输出的坐标格式 [x1, y1, x2, y2]，相对于模型输入尺寸
-                            qwen_bbox = table_data['bbox_2d']
-                            
-                            # 按照官方cookbook的坐标转换逻辑
-                            # 先转换为实际图片坐标
-                            abs_x1 = qwen_bbox[0] / input_width * image_width
-                            abs_y1 = qwen_bbox[1] / input_height * image_height
-                            abs_x2 = qwen_bbox[2] / input_width * image_width  
-                            abs_y2 = qwen_bbox[3] / input_height * image_height
-                            
-                            # 确保坐标顺序正确
-                            if abs_x1 > abs_x2:
-                                abs_x1, abs_x2 = abs_x2, abs_x1
-                            if abs_y1 > abs_y2:
-                                abs_y1, abs_y2 = abs_y2, abs_y1
-                            
-                            # 再映射到PDF坐标系
-                            scale_x = page_width / image_width
-                            scale_y = page_height / image_height
-                            
-                            pdf_x1 = abs_x1 * scale_x
-                            pdf_y1 = abs_y1 * scale_y
-                            pdf_x2 = abs_x2 * scale_x
-                            pdf_y2 = abs_y2 * scale_y
-                            
-                            pdf_bbox = [pdf_x1, pdf_y1, pdf_x2, pdf_y2]
-                            
-                            tables.append({
-                                'type': 'table',
-                                'bbox': pdf_bbox,
-                                'index': i,
-                                'rect': fitz.Rect(pdf_bbox),
-                                'label': table_data.get('label', '表格'),
-                                'confidence': table_data.get('confidence', 1.0)
-                            })
-                            
-                            self._thread_safe_print(f"      检测到表格 {i+1}: Qwen坐标{qwen_bbox} -> 图片坐标[{abs_x1:.1f},{abs_y1:.1f},{abs_x2:.1f},{abs_y2:.1f}] -> PDF坐标{pdf_bbox}")
+                    # Qwen输出的坐标格式 [x1, y1, x2, y2]，相对于模型输入尺寸；
+                    # 按照官方cookbook的坐标转换逻辑，所有检测框一次性转换为实际图片坐标，再映射到PDF坐标系
+                    box_indices = [i for i, table_data in enumerate(detected_tables) if 'bbox_2d' in table_data]
+                    qwen_boxes = np.array([detected_tables[i]['bbox_2d'] for i in box_indices], dtype=np.float64).reshape(-1, 4)
+                    image_boxes = qwen_boxes / np.array([input_width, input_height, input_width, input_height], dtype=np.float64) \
+                        * np.array([image_width, image_height, image_width, image_height], dtype=np.float64)
                     
-                    self._thread_safe_print(f"    共检测到 {len(tables)} 个表格")
+                    # 确保坐标顺序正确（x、y两列分别原地排序）
+                    image_boxes[:, 0::2].sort(axis=1)
+                    image_boxes[:, 1::2].sort(axis=1)
                     
-                    # 绘制预测框到图片上并保存
-                    if detected_tables:
-                        # 转换为图片坐标用于绘制
-                        image_predictions = []
-                        for table_data in detected_tables:
-                            if 'bbox_2d' in table_data:
-                                qwen_bbox = table_data['bbox_2d']
-                                # 转换为实际图片坐标
-                                abs_x1 = qwen_bbox[0] / input_width * image_width
-                                abs_y1 = qwen_bbox[1] / input_height * image_height
-                                abs_x2 = qwen_bbox[2] / input_width * image_width  
-                                abs_y2 = qwen_bbox[3] / input_height * image_height
-                                
-                                # 确保坐标顺序正确
-                                if abs_x1 > abs_x2:
-                                    abs_x1, abs_x2 = abs_x2, abs_x1
-                                if abs_y1 > abs_y2:
-                                    abs_y1, abs_y2 = abs_y2, abs_y1
-                                
-                                # 创建用于绘制的预测数据
-                                image_pred = table_data.copy()
-                                image_pred['bbox_2d'] = [abs_x1, abs_y1, abs_x2, abs_y2]
-                                image_predictions.append(image_pred)
+                    scale_x = page_width / image_width
+                    scale_y = page_height / image_height
+                    pdf_boxes = image_boxes * np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float64)
+                    
+                    # 图片坐标同时用于绘制预测框（仅在保存标注图片时）
+                    image_predictions = []
+                    for i, image_box, pdf_bbox in zip(box_indices, image_boxes.tolist(), pdf_boxes.tolist()):
+                        table_data = detected_tables[i]
+                        tables.append({
+                            'type': 'table',
+                            'bbox': pdf_bbox,
+                            'index': i,
+                            'label': table_data.get('label', '表格'),
+                            'confidence': table_data.get('confidence', 1.0)
+                        })
+                        
+                        if self.save_prediction_images:
+                            image_pred = table_data.copy()
+                            image_pred['bbox_2d'] = image_box
+                            image_predictions.append(image_pred)
                         
-                        self._draw_predictions_on_image(page_image_path, image_predictions, os.path.basename(page_image_path))
+                        if self.verbose:
+                            abs_x1, abs_y1, abs_x2, abs_y2 = image_box
+                            self._thread_safe_print(f"      检测到表格 {i+1}: Qwen坐标{table_data['bbox_2d']} -> 图片坐标[{abs_x1:.1f},{abs_y1:.1f},{abs_x2:.1f},{abs_y2:.1f}] -> PDF坐标{pdf_bbox}")
+                    
+                    self._thread_safe_print(f"    共检测到 {len(tables)} 个表格")
+                    
+                    # 绘制预测框到图片上并保存（调试用）
+                    if detected_tables and self.save_prediction_images:
+                        self._draw_predictions_on_image(page_image_path, image_predictions, os.path.basename(page_image_path), image_data)
                 
                 else:
                     self._thread_safe_print(f"    未能从API响应中提取有效的JSON: {result[:200]}...")
@@ -1163,20 +1848,25 @@ class PDFBboxExtractor:
                 
         except Exception as e:
             self._thread_safe_print(f"    表格检测过程中出错: {str(e)}")
+            if raise_errors:
+                raise
         
         return tables
     
     def draw_bboxes_on_page(self, page: fitz.Page, elements: List[Dict[str, Any]]) -> None:
         """
-        在页面上绘制边界框
+        在页面上绘制边界框（所有图形累积到同一个Shape中，一次提交到页面内容流）
         
         Args:
             page: PyMuPDF页面对象
             elements: 要绘制的元素列表
         """
+        shape = page.new_shape()
+        
+        # 按颜色和线宽分组绘制矩形框，每组只需一次finish
+        rect_groups = defaultdict(list)
         for element in elements:
             element_type = element['type']
-            rect = element['rect']
             color = self.colors.get(element_type, (0, 0, 0))
             
             # 确定线条宽度（修正过的表格使用更粗的线条）
@@ -1186,8 +1876,17 @@ class PDFBboxExtractor:
             elif element_type == 'vector_graphic':
                 line_width = self.line_width * 3  # 矢量图使用3倍线宽以突出显示
             
-            # 绘制矩形框
-            page.draw_rect(rect, color=color, width=line_width)
+            rect_groups[(color, line_width)].append(_element_rect(element))
+        
+        for (color, line_width), rects in rect_groups.items():
+            for rect in rects:
+                shape.draw_rect(rect)
+            shape.finish(color=color, width=line_width)
+        
+        for element in elements:
+            element_type = element['type']
+            rect = _element_rect(element)
+            color = self.colors.get(element_type, (0, 0, 0))
             
             # 添加标签
             label_point = fitz.Point(rect.x0, rect.y0 - 5)
@@ -1215,223 +1914,519 @@ class PDFBboxExtractor:
                 # 添加组件类型详情（在第二行显示）
                 type_summary = ', '.join([f"{t}:{c}" for t, c in component_types.items()])
                 detail_point = fitz.Point(rect.x0, rect.y0 + 10)
-                page.insert_text(detail_point, f"[{type_summary}]", fontsize=6, color=color)
+                shape.insert_text(detail_point, f"[{type_summary}]", fontsize=6, color=color)
+            
+            # 绘制标签文本
+            shape.insert_text(label_point, label_text, fontsize=8, color=color)
+        
+        shape.commit()
+    
+    def _precheck_tables_in_grid(self, page_nums: List[int], grid_path: str, model_id: str,
+                                 max_retries: int, retry_delay: float,
+                                 documents: _ThreadLocalDocuments,
+                                 retry_stats: Optional[Dict[str, int]] = None,
+                                 quality: int = 90) -> Optional[set]:
+        """
+        将多个页面的缩略图拼接为一张带编号的网格图片，一次API调用预检查哪些页面包含表格
+        
+        Args:
+            page_nums: 页面编号列表（从0开始）
+            grid_path: 网格图片名称（图片只保存在内存中）
+            model_id: Qwen模型ID
+            max_retries: API调用最大重试次数
+            retry_delay: API调用重试间隔
+            documents: 按线程缓存的文档实例
+            retry_stats: API重试统计字典（累加'retries'计数）
+            quality: 网格图片的JPEG质量
             
-            # 绘制标签文本
-            page.insert_text(label_point, label_text, fontsize=8, color=color)
+        Returns:
+            包含表格的页面编号集合；API调用失败或响应无法解析时返回None
+        """
+        from PIL import Image, ImageDraw
+        from utils.html_parser import inference_with_api
+        
+        cols = math.ceil(math.sqrt(len(page_nums)))
+        rows = math.ceil(len(page_nums) / cols)
+        tile = _GRID_TILE_SIZE
+        
+        try:
+            # 按从左到右、从上到下的顺序粘贴缩略图，并在左上角标注编号
+            grid = Image.new("RGB", (cols * tile, rows * tile), (255, 255, 255))
+            draw = ImageDraw.Draw(grid)
+            font = _get_font("arial.ttf", 28)
+            doc = documents.get()
+            for k, page_num in enumerate(page_nums):
+                page = doc[page_num]
+                zoom = tile / max(page.rect.width, page.rect.height)
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+                thumb = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+                pix = None
+                x = (k % cols) * tile
+                y = (k // cols) * tile
+                grid.paste(thumb, (x, y))
+                draw.rectangle([x, y, x + tile - 1, y + tile - 1], outline=(0, 0, 0), width=2)
+                if font:
+                    draw.text((x + 6, y + 4), str(k + 1), fill=(255, 0, 0), font=font)
+                else:
+                    draw.text((x + 6, y + 4), str(k + 1), fill=(255, 0, 0))
+            buffer = io.BytesIO()
+            grid.save(buffer, 'JPEG', quality=quality, optimize=True)
+            grid.close()
+            
+            prompt = (f"该图片由{len(page_nums)}个页面缩略图按从左到右、从上到下的顺序拼接而成，每个缩略图左上角标有编号。"
+                      f"请找出包含表格的缩略图编号，以JSON数组格式输出，例如[1, 3]；若都不包含表格，输出[]")
+            result = inference_with_api(
+                image_path=grid_path,
+                prompt=prompt,
+                model_id=model_id,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                retry_stats=retry_stats,
+                image_base64=base64.b64encode(buffer.getvalue()).decode("utf-8")
+            )
+            
+            json_start = result.find('[')
+            json_end = result.rfind(']') + 1
+            if json_start == -1 or json_end <= json_start:
+                return None
+            tile_numbers = _loads_json(result[json_start:json_end])
+            return {page_nums[n - 1] for n in tile_numbers if isinstance(n, int) and 1 <= n <= len(page_nums)}
+            
+        except Exception as e:
+            self._thread_safe_print(f"    批量表格预检查失败，相关页面将逐页预检查: {str(e)}")
+            return None
+    
+    def _render_page_image(self, page: fitz.Page, dpi: int = 300, max_side: Optional[int] = None,
+                           quality: int = 95) -> Tuple[bytes, int, int]:
+        """
+        将页面渲染为内存中的JPEG图片供表格检测使用
+        
+        Args:
+            page: PyMuPDF页面对象
+            dpi: 渲染分辨率
+            max_side: 图片最长边上限（像素），超过时直接按更低分辨率渲染；None表示不限制
+            quality: JPEG质量
+            
+        Returns:
+            (JPEG字节, 图片宽度, 图片高度)
+        """
+        zoom = dpi / 72  # 72是PDF的默认DPI
+        if max_side:
+            zoom = min(zoom, max_side / max(page.rect.width, page.rect.height))
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+        image_width, image_height = pix.width, pix.height
+        
+        # 使用Pillow编码基线JPEG（Pixmap自带的编码器输出渐进式JPEG，慢数倍）；
+        # 图片直接引用Pixmap的像素内存（不复制），编码完成前需保持pix存活
+        from PIL import Image
+        img = Image.frombuffer("RGB", (image_width, image_height), pix.samples_mv, "raw", "RGB", 0, 1)
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=quality, optimize=True)
+        img.close()
+        image_data = buffer.getvalue()
+        # 释放内存
+        pix = None
+        return image_data, image_width, image_height
     
     def _process_single_page(self, pdf_path: str, page_num: int, page_image_path: Optional[str], 
                            enable_table_detection: bool, model_id: str, max_retries: int, 
-                           retry_delay: float, show_original_lines: bool, show_original_qwen_tables: bool) -> Dict[str, Any]:
+                           retry_delay: float, show_original_lines: bool, show_original_qwen_tables: bool,
+                           documents: Optional[_ThreadLocalDocuments] = None,
+                           table_prechecked: bool = False,
+                           process_executor: Optional[ProcessPoolExecutor] = None,
+                           vlm_max_side: Optional[int] = 1280, vlm_quality: int = 85,
+                           response_cache: Optional[_ResponseCache] = None,
+                           direct_detect: bool = False) -> PageResult:
         """
         处理单个PDF页面（线程安全版本）
         
         Args:
             pdf_path: PDF文件路径
             page_num: 页面编号（从0开始）
-            page_image_path: 页面图片路径（如果启用表格检测）
+            page_image_path: 页面图片名称（如果启用表格检测；图片在内存中渲染，名称仅用于命名预测框标注图片）
             enable_table_detection: 是否启用表格检测
             model_id: Qwen模型ID
             max_retries: API调用最大重试次数
             retry_delay: API调用重试间隔
             show_original_lines: 是否显示PDF原始框线
             show_original_qwen_tables: 是否显示原始Qwen表格框线
+            documents: 按线程缓存的文档实例；未提供时为本页单独打开文档
+            table_prechecked: 批量网格预检查是否已确认本页存在表格
+            process_executor: 进程池；提供时表格检测（网络I/O）在当前线程完成，其余CPU密集的元素提取交给进程池
+            vlm_max_side: 上传给模型的页面图片最长边上限（像素），None表示按300DPI渲染
+            vlm_quality: 上传图片的JPEG质量
+            response_cache: 模型API响应缓存
+            direct_detect: 是否不做预检查、直接用一次API调用检测表格
             
         Returns:
             页面处理结果
         """
         thread_id = threading.current_thread().ident
+        doc = None
         
         try:
-            # 为每个线程创建独立的PDF文档实例（避免并发问题）
-            doc = fitz.open(pdf_path)
+            # 每个线程使用独立的PDF文档实例（避免并发问题），有缓存时复用线程内已打开的文档
+            doc = documents.get() if documents is not None else fitz.open(pdf_path)
             page = doc[page_num]
             
             self._thread_safe_print(f"🧵 线程 {thread_id}: 开始处理第 {page_num + 1} 页...")
             
-            all_elements = []
-            page_stats = {'text_blocks': 0, 'images': 0, 'tables': 0, 'refined_tables': 0, 'original_lines': 0, 'vector_graphics': 0}
+            # 空白页不会产生任何元素，跳过渲染、表格检测和矢量图检测
+            if self._is_blank_page(page):
+                self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页为空白页，跳过处理")
+                return PageResult(page_num, [], PageStats(), thread_id=thread_id, skipped=True)
+            
+            page_stats = PageStats()
             
             # 1. 优先提取表格（如果启用）
-            tables = []
-            original_qwen_tables = []  # 保存原始Qwen表格框线
-            if enable_table_detection and page_image_path and os.path.exists(page_image_path):
-                try:
-                    page_rect = page.rect
-                    page_width = float(page_rect.width)
-                    page_height = float(page_rect.height)
-                    
-                    # 获取图片信息
-                    from PIL import Image
-                    img = Image.open(page_image_path)
-                    image_width, image_height = img.size
-                    img.close()
-                    
-                    tables = self.extract_tables_with_qwen(
-                        page_image_path,
-                        page_width,
-                        page_height,
-                        image_width,
-                        image_height,
-                        model_id=model_id,
-                        max_retries=max_retries,
-                        retry_delay=retry_delay
-                    )
-                    tables = tables or []
-                    
-                    # 保存原始Qwen表格框线（如果启用）
-                    if show_original_qwen_tables and tables:
-                        original_qwen_tables = []
-                        for i, table in enumerate(tables):
-                            original_qwen_tables.append({
-                                'type': 'original_qwen_table',
-                                'bbox': table['bbox'].copy(),
-                                'index': i,
-                                'rect': fitz.Rect(table['bbox'])
-                            })
-                        self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页保存了 {len(original_qwen_tables)} 个原始Qwen表格框线")
-                    
-                    # 使用PyMuPDF线条信息修正表格边框
-                    if tables:
-                        self._thread_safe_print(f"🧵 线程 {thread_id}: 对第 {page_num + 1} 页的 {len(tables)} 个检测到的表格进行边框修正...")
-                        tables = self._refine_table_predictions(tables, page)
-                    
-                    page_stats['tables'] = len(tables)
-                    # 统计修正的表格数量
-                    refined_count = sum(1 for table in tables if table.get('refined', False))
-                    page_stats['refined_tables'] = refined_count
-                    
-                    if len(tables) > 0:
-                        self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页成功检测到 {len(tables)} 个表格{f' (其中{refined_count}个边框已修正)' if refined_count > 0 else ''}")
-                    else:
-                        self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页预检查发现表格但详细检测未找到具体位置")
-                        
-                except Exception as e:
-                    self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页表格检测失败: {str(e)}")
+            tables, original_qwen_tables, table_error = self._detect_page_tables(
+                page, page_num, page_image_path, enable_table_detection, model_id, max_retries,
+                retry_delay, show_original_qwen_tables, table_prechecked, page_stats,
+                vlm_max_side, vlm_quality, process_executor, response_cache, direct_detect
+            )
+            
+            # 2~6. 提取图像、文本块、原始框线并检测矢量图
+            if process_executor is not None:
+                result = process_executor.submit(
+                    _extract_page_elements_in_worker, page_num, tables, original_qwen_tables,
+                    page_stats, show_original_lines
+                ).result()
+                all_elements, page_stats = result
             else:
-                self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页跳过表格检测（未启用或图片不可用）")
-                tables = []
-            
-            # 2. 提取图像并去重
-            images = self.extract_images(page)
-            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页找到 {len(images)} 个图像（已去重）")
-            page_stats['images'] = len(images)
-            
-            # 3. 移除与图像重叠的表格（优先保留图像）
-            if tables and images:
-                original_table_count = len(tables)
-                tables = self._remove_overlapping_tables(tables, images)
-                if len(tables) < original_table_count:
-                    self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页表格去重: {original_table_count} → {len(tables)} (移除与图像重叠的)")
-                    page_stats['tables'] = len(tables)
-                    # 重新统计修正的表格数量
-                    refined_count = sum(1 for table in tables if table.get('refined', False))
-                    page_stats['refined_tables'] = refined_count
-            
-            # 4. 提取文本块并移除与表格重叠的（传入表格信息以避免合并表格附近的文本块）
-            text_blocks = self.extract_text_blocks(page, tables)
-            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页找到 {len(text_blocks)} 个原始文本块")
-            
-            # 移除与表格重叠的文字块
-            filtered_text_blocks = self._remove_overlapping_text_blocks(text_blocks, tables)
-            page_stats['text_blocks'] = len(filtered_text_blocks)
-            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页保留 {len(filtered_text_blocks)} 个文本块（已移除与表格重叠的）")
-            
-            # 5. 提取原始框线（如果启用）
-            original_lines = []
-            if show_original_lines:
-                original_lines = self.extract_original_lines(page)
-                self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页找到 {len(original_lines)} 个原始框线")
-                page_stats['original_lines'] = len(original_lines)
-            
-            # 6. 矢量图检测和合并（在合并所有元素之前进行）
-            # 创建候选元素列表（排除表格，因为它们有特殊的处理逻辑）
-            candidate_elements = []
-            candidate_elements.extend(images)
-            candidate_elements.extend(filtered_text_blocks)
-            candidate_elements.extend(original_lines)
-            
-            # 检测并合并矢量图
-            vector_graphics = []
-            if candidate_elements:
-                self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页开始矢量图检测 (候选元素: {len(candidate_elements)})")
-                processed_elements = self._detect_and_merge_vector_graphics(candidate_elements)
+                all_elements = self._extract_page_elements(
+                    page, page_num, tables, original_qwen_tables, page_stats, show_original_lines
+                )
+            
+            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页处理完成，共 {len(all_elements)} 个元素")
+            
+            # 表格检测失败时其余元素照常返回，但标记为部分成功，便于后续只重试这些页面
+            if table_error:
+                return PageResult(page_num, all_elements, page_stats, status='partial', error=table_error, thread_id=thread_id)
+            return PageResult(page_num, all_elements, page_stats, thread_id=thread_id)
+            
+        except Exception as e:
+            error_msg = f"处理第 {page_num + 1} 页时出错: {str(e)}"
+            self._thread_safe_print(f"🧵 线程 {thread_id}: ❌ {error_msg}")
+            return PageResult(page_num, status='error', error=error_msg, thread_id=thread_id)
+        
+        finally:
+            # 关闭单独打开的文档实例，出错时也及时释放MuPDF的原生内存（线程缓存的文档由process_pdf统一关闭）
+            if documents is None and doc is not None:
+                doc.close()
+    
+    def _is_blank_page(self, page: fitz.Page) -> bool:
+        """
+        判断页面是否为空白页（无文本、图像、注释和矢量绘图），按开销从低到高依次检查
+        
+        Args:
+            page: PyMuPDF页面对象
+            
+        Returns:
+            是否为空白页
+        """
+        if page.get_text("text").strip():
+            return False
+        if page.get_images() or page.first_annot is not None or page.first_widget is not None:
+            return False
+        return not page.get_cdrawings()
+    
+    def _page_has_graphics(self, page: fitz.Page) -> bool:
+        """
+        判断页面是否包含图像或矢量绘图（表格框线和扫描表格都依赖二者之一），先检查开销较低的图像列表
+        
+        Args:
+            page: PyMuPDF页面对象
+            
+        Returns:
+            是否包含图像或矢量绘图
+        """
+        return bool(page.get_images()) or bool(page.get_cdrawings())
+    
+    def _detect_page_tables(self, page: fitz.Page, page_num: int, page_image_path: Optional[str],
+                            enable_table_detection: bool, model_id: str, max_retries: int,
+                            retry_delay: float, show_original_qwen_tables: bool, table_prechecked: bool,
+                            page_stats: PageStats, vlm_max_side: Optional[int] = 1280,
+                            vlm_quality: int = 85,
+                            process_executor: Optional[ProcessPoolExecutor] = None,
+                            response_cache: Optional[_ResponseCache] = None,
+                            direct_detect: bool = False) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]:
+        """
+        使用Qwen检测页面表格并用PDF框线修正边框（网络I/O密集阶段）
+        
+        Args:
+            page: PyMuPDF页面对象
+            page_num: 页面编号（从0开始）
+            page_image_path: 页面图片名称（如果启用表格检测；图片在内存中渲染，名称仅用于命名预测框标注图片）
+            enable_table_detection: 是否启用表格检测
+            model_id: Qwen模型ID
+            max_retries: API调用最大重试次数
+            retry_delay: API调用重试间隔
+            show_original_qwen_tables: 是否保留原始Qwen表格框线
+            table_prechecked: 批量网格预检查是否已确认本页存在表格
+            page_stats: 页面统计（原地更新表格数量）
+            vlm_max_side: 上传给模型的页面图片最长边上限（像素），None表示按300DPI渲染
+            vlm_quality: 上传图片的JPEG质量
+            process_executor: 进程池；提供时CPU密集的框线提取和边框修正交给进程池
+            response_cache: 模型API响应缓存
+            direct_detect: 是否不做预检查、直接用一次API调用检测表格
+            
+        Returns:
+            (表格列表, 原始Qwen表格框线列表, 表格检测失败时的错误信息)
+        """
+        thread_id = threading.current_thread().ident
+        
+        table_error = None
+        retry_stats = {}
+        tables = []
+        original_qwen_tables = []  # 保存原始Qwen表格框线
+        if enable_table_detection and page_image_path:
+            try:
+                page_rect = page.rect
+                page_width = float(page_rect.width)
+                page_height = float(page_rect.height)
+                
+                # 页面图片在工作线程中按需渲染（与其他页面的API调用重叠进行），只渲染一次，
+                # JPEG字节保留在内存中供预检查、详细检测和预测框标注复用，不写入磁盘
+                image_data, image_width, image_height = self._render_page_image(page, max_side=vlm_max_side, quality=vlm_quality)
+                
+                tables = self.extract_tables_with_qwen(
+                    page_image_path,
+                    page_width,
+                    page_height,
+                    image_width,
+                    image_height,
+                    model_id=model_id,
+                    max_retries=max_retries,
+                    retry_delay=retry_delay,
+                    skip_precheck=table_prechecked,
+                    raise_errors=True,
+                    retry_stats=retry_stats,
+                    image_data=image_data,
+                    response_cache=response_cache,
+                    direct_detect=direct_detect
+                )
+                tables = tables or []
+                
+                # 保存原始Qwen表格框线（如果启用）
+                if show_original_qwen_tables and tables:
+                    original_qwen_tables = []
+                    for i, table in enumerate(tables):
+                        original_qwen_tables.append({
+                            'type': 'original_qwen_table',
+                            'bbox': table['bbox'].copy(),
+                            'index': i
+                        })
+                    self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页保存了 {len(original_qwen_tables)} 个原始Qwen表格框线")
                 
-                # 分离矢量图和其他元素
-                remaining_elements = []
-                for element in processed_elements:
-                    if element['type'] == 'vector_graphic':
-                        vector_graphics.append(element)
+                # 使用PyMuPDF线条信息修正表格边框
+                if tables:
+                    self._thread_safe_print(f"🧵 线程 {thread_id}: 对第 {page_num + 1} 页的 {len(tables)} 个检测到的表格进行边框修正...")
+                    if process_executor is not None:
+                        tables = process_executor.submit(_refine_tables_in_worker, page_num, tables).result()
                     else:
-                        remaining_elements.append(element)
+                        tables = self._refine_table_predictions(tables, page)
                 
-                # 更新各类元素列表
-                if vector_graphics:
-                    # 更新其他元素列表（移除被合并的元素）
-                    remaining_images = [e for e in remaining_elements if e['type'] == 'image']
-                    remaining_text_blocks = [e for e in remaining_elements if e['type'] == 'text']
-                    remaining_original_lines = [e for e in remaining_elements if e['type'] == 'original_line']
-                    
-                    # 重新分配索引
-                    for i, img in enumerate(remaining_images):
-                        img['index'] = i
-                    for i, vg in enumerate(vector_graphics):
-                        vg['index'] = i
-                    
-                    # 更新统计信息
-                    page_stats['images'] = len(remaining_images)
-                    page_stats['text_blocks'] = len(remaining_text_blocks)
-                    page_stats['original_lines'] = len(remaining_original_lines)
-                    page_stats['vector_graphics'] = len(vector_graphics)
-                    
-                    self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页矢量图检测完成: 创建了 {len(vector_graphics)} 个矢量图")
+                page_stats.tables = len(tables)
+                # 统计修正的表格数量
+                refined_count = sum(1 for table in tables if table.get('refined', False))
+                page_stats.refined_tables = refined_count
+                
+                if len(tables) > 0:
+                    self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页成功检测到 {len(tables)} 个表格{f' (其中{refined_count}个边框已修正)' if refined_count > 0 else ''}")
+                else:
+                    self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页预检查发现表格但详细检测未找到具体位置")
                     
-                    # 更新全局变量以便后续使用
-                    images = remaining_images
-                    filtered_text_blocks = remaining_text_blocks
-                    original_lines = remaining_original_lines
+            except Exception as e:
+                table_error = f"第 {page_num + 1} 页表格检测失败: {str(e)}"
+                self._thread_safe_print(f"🧵 线程 {thread_id}: {table_error}")
+            finally:
+                page_stats.api_retries = retry_stats.get('retries', 0)
+        else:
+            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页跳过表格检测（未启用或图片不可用）")
+            tables = []
+        
+        return tables, original_qwen_tables, table_error
+    
+    def _extract_page_elements(self, page: fitz.Page, page_num: int, tables: List[Dict[str, Any]],
+                               original_qwen_tables: List[Dict[str, Any]], page_stats: PageStats,
+                               show_original_lines: bool) -> List[Dict[str, Any]]:
+        """
+        提取页面图像、文本块和原始框线，检测矢量图并按优先级合并所有元素（CPU密集阶段）
+        
+        Args:
+            page: PyMuPDF页面对象
+            page_num: 页面编号（从0开始）
+            tables: 已检测的表格列表
+            original_qwen_tables: 原始Qwen表格框线列表
+            page_stats: 页面统计（原地更新）
+            show_original_lines: 是否提取PDF原始框线
+            
+        Returns:
+            页面全部元素列表
+        """
+        thread_id = threading.current_thread().ident
+        all_elements = []
+        
+        # 页面内容只解析一次，图像和文本块共用同一份块列表
+        blocks = page.get_text("dict")["blocks"]
+        
+        # 2. 提取图像并去重
+        images = self.extract_images(page, blocks)
+        self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页找到 {len(images)} 个图像（已去重）")
+        page_stats.images = len(images)
+        
+        # 3. 移除与图像重叠的表格（优先保留图像）
+        if tables and images:
+            original_table_count = len(tables)
+            tables = self._remove_overlapping_tables(tables, images)
+            if len(tables) < original_table_count:
+                self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页表格去重: {original_table_count} → {len(tables)} (移除与图像重叠的)")
+                page_stats.tables = len(tables)
+                # 重新统计修正的表格数量
+                refined_count = sum(1 for table in tables if table.get('refined', False))
+                page_stats.refined_tables = refined_count
+        
+        # 4. 提取文本块并移除与表格重叠的（传入表格信息以避免合并表格附近的文本块）
+        # 文本内容只为保留下来的文本块生成
+        text_blocks = self.extract_text_blocks(page, tables, blocks, with_content=False)
+        self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页找到 {len(text_blocks)} 个原始文本块")
+        
+        # 移除与表格重叠的文字块
+        filtered_text_blocks = self._remove_overlapping_text_blocks(text_blocks, tables)
+        self._fill_text_block_contents(filtered_text_blocks)
+        page_stats.text_blocks = len(filtered_text_blocks)
+        self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页保留 {len(filtered_text_blocks)} 个文本块（已移除与表格重叠的）")
+        
+        # 5. 提取原始框线（如果启用）
+        original_lines = []
+        if show_original_lines:
+            original_lines = self.extract_original_lines(page)
+            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页找到 {len(original_lines)} 个原始框线")
+            page_stats.original_lines = len(original_lines)
+        
+        # 6. 矢量图检测和合并（在合并所有元素之前进行）
+        # 创建候选元素列表（排除表格，因为它们有特殊的处理逻辑）
+        candidate_elements = []
+        candidate_elements.extend(images)
+        candidate_elements.extend(filtered_text_blocks)
+        candidate_elements.extend(original_lines)
+        
+        # 检测并合并矢量图
+        vector_graphics = []
+        if candidate_elements:
+            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页开始矢量图检测 (候选元素: {len(candidate_elements)})")
+            processed_elements = self._detect_and_merge_vector_graphics(candidate_elements)
+            
+            # 分离矢量图和其他元素
+            remaining_elements = []
+            for element in processed_elements:
+                if element['type'] == 'vector_graphic':
+                    vector_graphics.append(element)
                 else:
-                    page_stats['vector_graphics'] = 0
+                    remaining_elements.append(element)
+            
+            # 更新各类元素列表
+            if vector_graphics:
+                # 更新其他元素列表（移除被合并的元素）
+                remaining_images = [e for e in remaining_elements if e['type'] == 'image']
+                remaining_text_blocks = [e for e in remaining_elements if e['type'] == 'text']
+                remaining_original_lines = [e for e in remaining_elements if e['type'] == 'original_line']
+                
+                # 重新分配索引
+                for i, img in enumerate(remaining_images):
+                    img['index'] = i
+                for i, vg in enumerate(vector_graphics):
+                    vg['index'] = i
+                
+                # 更新统计信息
+                page_stats.images = len(remaining_images)
+                page_stats.text_blocks = len(remaining_text_blocks)
+                page_stats.original_lines = len(remaining_original_lines)
+                page_stats.vector_graphics = len(vector_graphics)
+                
+                self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页矢量图检测完成: 创建了 {len(vector_graphics)} 个矢量图")
+                
+                # 更新全局变量以便后续使用
+                images = remaining_images
+                filtered_text_blocks = remaining_text_blocks
+                original_lines = remaining_original_lines
             else:
-                page_stats['vector_graphics'] = 0
-                self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页跳过矢量图检测（无候选元素）")
-            
-            # 合并所有元素（按优先级：表格 -> 矢量图 -> 图像 -> 文本块 -> 原始框线）
-            all_elements.extend(tables)
-            all_elements.extend(vector_graphics)
-            all_elements.extend(images)
-            all_elements.extend(filtered_text_blocks)
-            all_elements.extend(original_lines)
-            all_elements.extend(original_qwen_tables)
+                page_stats.vector_graphics = 0
+        else:
+            page_stats.vector_graphics = 0
+            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页跳过矢量图检测（无候选元素）")
+        
+        # 合并所有元素（按优先级：表格 -> 矢量图 -> 图像 -> 文本块 -> 原始框线）
+        all_elements.extend(tables)
+        all_elements.extend(vector_graphics)
+        all_elements.extend(images)
+        all_elements.extend(filtered_text_blocks)
+        all_elements.extend(original_lines)
+        all_elements.extend(original_qwen_tables)
+        
+        return all_elements
+    
+    def _accumulate_page_stats(self, total_elements: Dict[str, int], result: PageResult) -> None:
+        """
+        将单页统计累加到全局统计
+        
+        Args:
+            total_elements: 全局统计字典
+            result: 单页处理结果
+        """
+        total_elements['text_blocks'] += result.stats.text_blocks
+        total_elements['images'] += result.stats.images
+        total_elements['tables'] += result.stats.tables
+        total_elements['refined_tables'] += result.stats.refined_tables
+        total_elements['original_lines'] += result.stats.original_lines
+        total_elements['vector_graphics'] += result.stats.vector_graphics
+        total_elements['original_qwen_tables'] += len([e for e in result.elements if e.get('type') == 'original_qwen_table'])
+    
+    def _draw_completed_pages(self, doc: fitz.Document, page_results: Dict[int, PageResult], next_page: int,
+                              all_elements_by_page: Dict[int, List[Dict[str, Any]]], finished: bool = False) -> int:
+        """
+        从next_page开始按页码顺序绘制已完成的页面，遇到尚未完成的页面即停止（页面处理期间即可逐步绘制）
+        
+        Args:
+            doc: 用于绘制的PDF文档
+            page_results: 已完成页面的处理结果
+            next_page: 下一个待绘制的页码
+            all_elements_by_page: 按页码顺序记录已绘制页面的元素（原地更新，用于保存元数据）
+            finished: 所有页面是否已处理完成；为True时跳过没有结果的页面，绘制剩余全部页面
             
-            self._thread_safe_print(f"🧵 线程 {thread_id}: 第 {page_num + 1} 页处理完成，共 {len(all_elements)} 个元素")
+        Returns:
+            下一个待绘制的页码
+        """
+        total_pages = len(doc)
+        while next_page < total_pages:
+            if next_page not in page_results:
+                if not finished:
+                    break
+                next_page += 1
+                continue
             
-            # 关闭文档实例
-            doc.close()
+            elements = page_results[next_page].elements
             
-            return {
-                'page_num': page_num,
-                'elements': all_elements,
-                'stats': page_stats,
-                'status': 'success',
-                'thread_id': thread_id
-            }
+            # 绘制所有边界框
+            if elements:
+                self.draw_bboxes_on_page(doc[next_page], elements)
+                print(f"  ✅ 第 {next_page + 1} 页: 绘制了 {len(elements)} 个边界框")
+            else:
+                print(f"  ⚪ 第 {next_page + 1} 页: 无边界框可绘制")
             
-        except Exception as e:
-            error_msg = f"处理第 {page_num + 1} 页时出错: {str(e)}"
-            self._thread_safe_print(f"🧵 线程 {thread_id}: ❌ {error_msg}")
-            return {
-                'page_num': page_num,
-                'elements': [],
-                'stats': {'text_blocks': 0, 'images': 0, 'tables': 0, 'refined_tables': 0, 'original_lines': 0, 'vector_graphics': 0},
-                'status': 'error',
-                'error': error_msg,
-                'thread_id': thread_id
-            }
+            # 保存当前页面的元素信息
+            all_elements_by_page[next_page] = elements
+            next_page += 1
+        
+        return next_page
     
     def process_pdf(self, input_path: str, output_path: str, enable_table_detection: bool = True, 
                     model_id: str = "Qwen/Qwen2.5-VL-7B-Instruct", max_retries: int = 3, retry_delay: float = 1.0,
-                    show_original_lines: bool = False, show_original_qwen_tables: bool = False) -> Dict[str, Any]:
+                    show_original_lines: bool = False, show_original_qwen_tables: bool = False,
+                    cache_path: Optional[str] = None, force_refresh: bool = False,
+                    precheck_batch_size: int = 1, use_processes: bool = False,
+                    vlm_max_side: Optional[int] = 1280, vlm_quality: int = 85,
+                    skip_pages_without_graphics: bool = False) -> Dict[str, Any]:
         """
         使用多线程并行处理整个PDF文件，提取并绘制所有边界框
         
@@ -1444,15 +2439,34 @@ class PDFBboxExtractor:
             retry_delay: API调用重试间隔
             show_original_lines: 是否显示PDF原始框线
             show_original_qwen_tables: 是否显示原始Qwen表格框线
+            cache_path: 逐页结果缓存（SQLite）路径，为None时不使用缓存
+            force_refresh: 是否忽略已有缓存强制重新处理所有页面
+            precheck_batch_size: 表格预检查时每次API调用包含的页面数，大于1时将多页缩略图拼接为网格图片批量预检查；
+                0表示不做预检查，每页只用一次API调用直接检测表格（无表格时模型输出空数组）
+            use_processes: 是否将CPU密集的表格边框修正、元素提取和矢量图检测交给进程池（每个CPU核心一个进程），
+                表格检测的API调用仍在线程中进行
+            vlm_max_side: 上传给模型的页面图片最长边上限（像素），减少上传数据量和视觉token数；None表示按300DPI渲染
+            vlm_quality: 上传图片的JPEG质量
+            skip_pages_without_graphics: 是否跳过既无图像也无矢量绘图的纯文本页面的表格检测（不调用模型API）；
+                没有框线的纯文本表格会因此漏检，适合表格均带框线或为图片的文档
             
         Returns:
             处理结果统计
         """
+        # 持有原生资源的对象，出错时在finally中统一释放
+        cache = None
+        doc = None
+        documents = None
+        process_executor = None
+        
         try:
-            # 打开PDF文档获取基本信息
-            doc = fitz.open(input_path)
+            # 只读取一次PDF文件，页数统计、各工作线程和最终绘制都从内存中的同一份数据打开文档
+            with open(input_path, 'rb') as f:
+                pdf_data = f.read()
+            
+            # 打开PDF文档获取基本信息；该文档保持打开，最终绘制时直接复用（工作线程使用各自的文档实例）
+            doc = fitz.open(stream=pdf_data, filetype="pdf")
             total_pages = len(doc)
-            doc.close()
             
             total_elements = {
                 'text_blocks': 0,
@@ -1462,49 +2476,53 @@ class PDFBboxExtractor:
                 'original_lines': 0,
                 'original_qwen_tables': 0,
                 'vector_graphics': 0,
+                'api_retries': 0,
+                'skipped_pages': 0,
                 'pages': total_pages
             }
             
             # 收集所有页面的元素用于保存元数据
             all_elements_by_page = {}
             
+            if self.verbose:
+                _start_log_thread()
+            
             print(f"🚀 开始并行处理PDF文件: {input_path}")
             print(f"📄 总页数: {total_pages}")
             print(f"🧵 使用线程数: {self.max_workers}")
             
-            # 如果启用表格检测，先转换PDF为图片
+            # 读取逐页结果缓存，命中的页面跳过矢量图检测和Qwen调用
+            cached_results = {}
+            if cache_path:
+                cache = _PageResultCache(cache_path)
+                pdf_hash = cache.pdf_hash(input_path, pdf_data)
+                cache_model = model_id if enable_table_detection else ''
+                cache_options = (f"v={_PAGE_CACHE_VERSION},tables={int(enable_table_detection)},"
+                                 f"lines={int(show_original_lines)},qwen_tables={int(show_original_qwen_tables)}")
+                if enable_table_detection and precheck_batch_size != 1:
+                    cache_options += f",precheck_batch={precheck_batch_size}"
+                if enable_table_detection:
+                    cache_options += f",vlm_max_side={vlm_max_side},vlm_quality={vlm_quality}"
+                if enable_table_detection and skip_pages_without_graphics:
+                    cache_options += ",skip_no_graphics=1"
+                if not force_refresh:
+                    for page_num in range(total_pages):
+                        cached = cache.get(pdf_hash, page_num, cache_model, cache_options)
+                        if cached is not None:
+                            elements, stats = cached
+                            cached_results[page_num] = PageResult(page_num, elements, stats)
+                print(f"💾 缓存命中: {len(cached_results)}/{total_pages} 页")
+                previously_failed = cache.failed_pages(pdf_hash, cache_model, cache_options)
+                if previously_failed and not force_refresh:
+                    print(f"🔁 重新处理上次失败的 {len(previously_failed)} 个页面: {[page_num + 1 for page_num in previously_failed]}")
+            
+            # 如果启用表格检测，为各页分配图片名称（所有页面均命中缓存时无需渲染）
+            # 页面图片由工作线程在处理该页时渲染并只保存在内存中，不写入磁盘，名称仅用于命名预测框标注图片
             page_images = {}
-            if enable_table_detection:
-                from utils.pdf_converter import pdf_to_jpg
-                import tempfile
-                
-                print(f"🖼️ 开始转换PDF为图片以进行表格检测...")
-                
-                try:
-                    # 读取PDF文件字节
-                    with open(input_path, 'rb') as pdf_file:
-                        pdf_bytes = pdf_file.read()
-                    
-                    # 创建临时目录用于存储图片
-                    temp_dir = tempfile.mkdtemp()
-                    
-                    # 转换PDF为图片
-                    image_paths = pdf_to_jpg(
-                        pdf_bytes,
-                        pdf_filename="temp_for_table_detection",
-                        output_dir=temp_dir,
-                        dpi=300
-                    )
-                    
-                    # 构建页码到图片路径的映射
-                    for i, img_path in enumerate(image_paths):
-                        page_images[i] = img_path
-                    
-                    print(f"✅ PDF转换完成，共生成 {len(image_paths)} 张图片")
-                    
-                except Exception as e:
-                    print(f"❌ PDF转换失败，将跳过表格检测: {str(e)}")
-                    enable_table_detection = False
+            if enable_table_detection and len(cached_results) < total_pages:
+                for page_num in range(total_pages):
+                    page_images[page_num] = f"temp_for_table_detection_page_{page_num + 1}.jpg"
+                print(f"🖼️ 页面图片将在各线程中按需渲染以进行表格检测")
             
             # 多线程并行处理所有页面
             page_results = {}
@@ -1512,11 +2530,89 @@ class PDFBboxExtractor:
             
             start_time = time.time()
             
+            # 每个工作线程只打开一次PDF文档
+            documents = _ThreadLocalDocuments(input_path, pdf_data)
+            
+            # 缓存命中的页面直接计入结果
+            for page_num, result in cached_results.items():
+                page_results[page_num] = result
+                self._accumulate_page_stats(total_elements, result)
+            
+            # 批量网格预检查：每precheck_batch_size页一次API调用，只有包含表格的页面才渲染高分辨率图片并详细检测
+            pages_with_tables = set()
+            pages_without_tables = set()
+            
+            # 纯文本页面（无图像和矢量绘图）直接视为无表格，不参与预检查和详细检测
+            if page_images and skip_pages_without_graphics:
+                pages_without_tables.update(
+                    page_num for page_num in range(total_pages)
+                    if page_num not in cached_results and not self._page_has_graphics(doc[page_num])
+                )
+                print(f"📝 {len(pages_without_tables)} 页无图像和矢量绘图，跳过表格检测")
+            
+            if page_images and precheck_batch_size > 1:
+                pending_pages = [page_num for page_num in range(total_pages)
+                                 if page_num not in cached_results and page_num not in pages_without_tables]
+                batches = [pending_pages[i:i + precheck_batch_size] for i in range(0, len(pending_pages), precheck_batch_size)]
+                print(f"🔲 批量表格预检查: {len(pending_pages)} 页合并为 {len(batches)} 次API调用")
+                grid_retry_stats = {}
+                
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    future_to_batch = {
+                        executor.submit(
+                            self._precheck_tables_in_grid,
+                            batch,
+                            f"temp_for_table_detection_grid_pages_{'_'.join(str(n + 1) for n in batch)}.jpg",
+                            model_id,
+                            max_retries,
+                            retry_delay,
+                            documents,
+                            grid_retry_stats,
+                            vlm_quality
+                        ): batch
+                        for batch in batches
+                    }
+                    for future in as_completed(future_to_batch):
+                        batch = future_to_batch[future]
+                        flagged = future.result()
+                        # 无法解析的批次保持未知，由各页面逐页预检查
+                        if flagged is not None:
+                            pages_with_tables.update(flagged)
+                            pages_without_tables.update(page_num for page_num in batch if page_num not in flagged)
+                
+                print(f"✅ 批量预检查完成: {len(pages_with_tables)} 页包含表格, {len(pages_without_tables)} 页无表格")
+                total_elements['api_retries'] += grid_retry_stats.get('retries', 0)
+            
+            # 模型API响应与逐页结果使用同一缓存数据库；强制刷新或未使用缓存数据库时只在本次运行内复用，
+            # 内容相同的页面（如重复的分隔页、模板页）只请求一次
+            response_cache = None
+            if enable_table_detection:
+                response_cache = cache if cache is not None and not force_refresh else _MemoryResponseCache()
+            # precheck_batch_size为0时跳过预检查，预检查与详细检测合并为每页一次API调用
+            direct_detect = enable_table_detection and precheck_batch_size == 0
+            
+            # CPU密集阶段（表格边框修正、元素提取和矢量图检测）可选交给进程池，绕开GIL利用多核
+            if use_processes:
+                import multiprocessing
+                
+                # 任务由工作线程提交，使用spawn避免在多线程进程中fork
+                process_executor = ProcessPoolExecutor(
+                    max_workers=os.cpu_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_page_worker,
+                    initargs=(input_path,)
+                )
+                print(f"⚙️ 表格边框修正、元素提取和矢量图检测使用进程数: {os.cpu_count()}")
+            
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 # 提交所有页面处理任务
                 future_to_page = {}
                 for page_num in range(total_pages):
+                    if page_num in cached_results:
+                        continue
                     page_image_path = page_images.get(page_num) if enable_table_detection else None
+                    if page_num in pages_without_tables:
+                        page_image_path = None
                     
                     future = executor.submit(
                         self._process_single_page,
@@ -1528,37 +2624,45 @@ class PDFBboxExtractor:
                         max_retries,
                         retry_delay,
                         show_original_lines,
-                        show_original_qwen_tables
+                        show_original_qwen_tables,
+                        documents,
+                        page_num in pages_with_tables,
+                        process_executor,
+                        vlm_max_side,
+                        vlm_quality,
+                        response_cache,
+                        direct_detect
                     )
                     future_to_page[future] = page_num
                 
-                # 收集处理结果
-                completed_count = 0
+                # 收集处理结果；绘制在主线程中随页面完成按页码顺序进行，与其余页面的处理（API等待）重叠
+                print(f"🎨 页面处理完成后即按页码顺序绘制边界框")
+                completed_count = len(cached_results)
+                next_page = self._draw_completed_pages(doc, page_results, 0, all_elements_by_page)
                 for future in as_completed(future_to_page):
                     page_num = future_to_page[future]
                     try:
                         result = future.result()
                         completed_count += 1
                         
-                        if result['status'] == 'success':
+                        if result.status in ('success', 'partial'):
                             page_results[page_num] = result
-                            # 更新统计信息
-                            total_elements['text_blocks'] += result['stats']['text_blocks']
-                            total_elements['images'] += result['stats']['images']
-                            total_elements['tables'] += result['stats']['tables']
-                            total_elements['refined_tables'] += result['stats']['refined_tables']
-                            total_elements['original_lines'] += result['stats'].get('original_lines', 0)
-                            total_elements['vector_graphics'] += result['stats'].get('vector_graphics', 0)
-                            total_elements['original_qwen_tables'] += len([e for e in result['elements'] if e.get('type') == 'original_qwen_table'])
+                            # 更新统计信息（API重试次数只统计本次实际处理的页面）
+                            self._accumulate_page_stats(total_elements, result)
+                            total_elements['api_retries'] += result.stats.api_retries
+                            if result.skipped:
+                                total_elements['skipped_pages'] += 1
+                        if result.status == 'success':
+                            if cache is not None:
+                                cache.put(pdf_hash, page_num, cache_model, cache_options, result.elements, result.stats)
                         else:
-                            failed_pages.append((page_num, result.get('error', '未知错误')))
-                            # 为失败的页面创建空结果
-                            page_results[page_num] = {
-                                'page_num': page_num,
-                                'elements': [],
-                                'stats': {'text_blocks': 0, 'images': 0, 'tables': 0, 'refined_tables': 0, 'original_lines': 0, 'vector_graphics': 0},
-                                'status': 'error'
-                            }
+                            failed_pages.append((page_num, result.error or '未知错误'))
+                            # 记录失败页面，下次运行时只重新处理这些页面
+                            if cache is not None:
+                                cache.put(pdf_hash, page_num, cache_model, cache_options, None, None)
+                            if result.status == 'error':
+                                # 为失败的页面创建空结果
+                                page_results[page_num] = PageResult(page_num, status='error')
                         
                         # 显示进度
                         progress = (completed_count / total_pages) * 100
@@ -1566,16 +2670,26 @@ class PDFBboxExtractor:
                         
                     except Exception as e:
                         failed_pages.append((page_num, str(e)))
+                        if cache is not None:
+                            cache.put(pdf_hash, page_num, cache_model, cache_options, None, None)
                         completed_count += 1
                         # 创建错误页面的空结果
-                        page_results[page_num] = {
-                            'page_num': page_num,
-                            'elements': [],
-                            'stats': {'text_blocks': 0, 'images': 0, 'tables': 0, 'refined_tables': 0, 'original_lines': 0, 'vector_graphics': 0},
-                            'status': 'error'
-                        }
+                        page_results[page_num] = PageResult(page_num, status='error')
+                    
+                    next_page = self._draw_completed_pages(doc, page_results, next_page, all_elements_by_page)
+            
+            # 页面处理完成后立即释放各线程的文档实例、工作进程和缓存连接，再进入汇总绘制阶段
+            documents.close()
+            documents = None
+            if process_executor is not None:
+                process_executor.shutdown()
+                process_executor = None
+            if cache is not None:
+                cache.close()
+                cache = None
             
             processing_time = time.time() - start_time
+            self._flush_log()
             print(f"⏱️ 并行处理完成，耗时: {processing_time:.2f} 秒")
             
             # 报告失败的页面
@@ -1584,42 +2698,13 @@ class PDFBboxExtractor:
                 for page_num, error in failed_pages:
                     print(f"  - 第 {page_num + 1} 页: {error}")
             
-            # 清理临时图片文件
-            if page_images:
-                import shutil
-                for img_path in page_images.values():
-                    temp_dir = os.path.dirname(img_path)
-                    break
-                try:
-                    shutil.rmtree(temp_dir)
-                    print(f"🧹 清理临时图片文件: {temp_dir}")
-                except Exception:
-                    pass
-            
-            # 汇总并绘制边界框到最终PDF
-            print(f"🎨 开始汇总并绘制边界框...")
-            
-            # 重新打开PDF进行绘制
-            doc = fitz.open(input_path)
-            
-            for page_num in range(total_pages):
-                if page_num in page_results:
-                    page = doc[page_num]
-                    elements = page_results[page_num]['elements']
-                    
-                    # 绘制所有边界框
-                    if elements:
-                        self.draw_bboxes_on_page(page, elements)
-                        print(f"  ✅ 第 {page_num + 1} 页: 绘制了 {len(elements)} 个边界框")
-                    else:
-                        print(f"  ⚪ 第 {page_num + 1} 页: 无边界框可绘制")
-                    
-                    # 保存当前页面的元素信息
-                    all_elements_by_page[page_num] = elements
+            # 绘制剩余页面（正常情况下所有页面已在处理期间绘制完成）
+            self._draw_completed_pages(doc, page_results, next_page, all_elements_by_page, finished=True)
             
             # 保存处理后的PDF
             doc.save(output_path)
             doc.close()
+            doc = None
             
             # 保存元数据
             metadata_path = self._save_bbox_metadata(all_elements_by_page, output_path, input_path)
@@ -1639,6 +2724,10 @@ class PDFBboxExtractor:
                 print(f"  - 原始框线: {total_elements['original_lines']} (橙色)")
             if total_elements['original_qwen_tables'] > 0:
                 print(f"  - 原始Qwen表格: {total_elements['original_qwen_tables']} (紫色)")
+            if total_elements['api_retries'] > 0:
+                print(f"  - API重试次数: {total_elements['api_retries']}")
+            if total_elements['skipped_pages'] > 0:
+                print(f"  - 跳过的空白页: {total_elements['skipped_pages']}")
             print(f"  - 总页数: {total_elements['pages']}")
             print(f"🧵 使用线程数: {self.max_workers}")
             print(f"⏱️ 总耗时: {processing_time:.2f} 秒")
@@ -1658,15 +2747,27 @@ class PDFBboxExtractor:
             if total_elements['vector_graphics'] > 0:
                 print(f"🟦 矢量图检测已启用，{total_elements['vector_graphics']}个密集区域被识别为矢量图（30×30px区域内同时包含线条和图像）")
             
+            # 只有所有页面都处理失败时才视为整体失败，部分页面失败时返回成功并在failed_pages中列出
+            failed_page_count = sum(1 for result in page_results.values() if result.status == 'error')
+            if total_pages > 0 and failed_page_count == total_pages:
+                status = 'error'
+                message = f'所有 {total_pages} 页均处理失败'
+            else:
+                status = 'success'
+                message = f'成功并行处理 {total_elements["pages"]} 页，共提取 {sum([total_elements[key] for key in ["text_blocks", "images", "tables", "vector_graphics"]])} 个元素'
+                if failed_pages:
+                    message += f'（{len(failed_pages)} 页处理失败或部分失败）'
+            
             return {
-                'status': 'success',
-                'message': f'成功并行处理 {total_elements["pages"]} 页，共提取 {sum([total_elements[key] for key in ["text_blocks", "images", "tables", "vector_graphics"]])} 个元素',
+                'status': status,
+                'message': message,
                 'statistics': total_elements,
                 'input_path': input_path,
                 'output_path': output_path,
                 'metadata_path': metadata_path,
                 'processing_time': processing_time,
                 'failed_pages': failed_pages,
+                'cached_pages': len(cached_results),
                 'threads_used': self.max_workers
             }
             
@@ -1684,6 +2785,16 @@ class PDFBboxExtractor:
                 'failed_pages': [],
                 'threads_used': self.max_workers
             }
+        
+        finally:
+            if doc is not None:
+                doc.close()
+            if documents is not None:
+                documents.close()
+            if process_executor is not None:
+                process_executor.shutdown()
+            if cache is not None:
+                cache.close()
     
     def _save_bbox_metadata(self, all_elements_by_page: Dict[int, List[Dict[str, Any]]], 
                            output_path: str, input_path: str) -> str:
@@ -1724,55 +2835,66 @@ class PDFBboxExtractor:
                 "pages": {}
             }
             
-            # 按页处理元素
-            for page_num, elements in all_elements_by_page.items():
-                page_data = {
-                    "page_number": page_num + 1,
-                    "elements": []
-                }
+            # 先统计各类元素数量（摘要位于页面数据之前）
+            type_counts = Counter()
+            refined_tables = 0
+            for elements in all_elements_by_page.values():
+                type_counts.update(element['type'] for element in elements)
+                refined_tables += sum(1 for element in elements if element['type'] == 'table' and element.get('refined', False))
+            
+            summary = metadata["summary"]
+            summary["total_text_blocks"] = type_counts['text']
+            summary["total_images"] = type_counts['image']
+            summary["total_tables"] = type_counts['table']
+            summary["refined_tables"] = refined_tables
+            summary["total_original_lines"] = type_counts['original_line']
+            summary["total_original_qwen_tables"] = type_counts['original_qwen_table']
+            summary["total_vector_graphics"] = type_counts['vector_graphic']
+            
+            # 逐页流式写入JSON，避免在内存中构建完整的元数据字典
+            with open(metadata_path, 'wb') as f:
+                # 头部以空的pages对象结尾，去掉"{}\n}"后逐页追加
+                head = _dumps_json(metadata)
+                f.write(head[:head.rindex(b'{}')])
+                f.write(b'{')
                 
-                for element in elements:
-                    element_data = {
-                        "type": element['type'],
-                        "bbox": element['bbox'],
-                        "index": element.get('index', 0)
+                for page_count, (page_num, elements) in enumerate(all_elements_by_page.items()):
+                    page_data = {
+                        "page_number": page_num + 1,
+                        "elements": []
                     }
                     
-                    # 添加类型特定的信息
-                    if element['type'] == 'text':
-                        element_data['content'] = element.get('content', '')[:200]  # 限制长度
-                    elif element['type'] == 'table':
-                        element_data['label'] = element.get('label', '表格')
-                        element_data['confidence'] = element.get('confidence', 1.0)
-                        element_data['refined'] = element.get('refined', False)  # 是否被框线修正
-                    elif element['type'] == 'vector_graphic':
-                        element_data['component_types'] = element.get('component_types', {})
-                        element_data['component_count'] = element.get('component_count', 0)
-                        element_data['component_details'] = element.get('component_details', [])
-                    
-                    page_data['elements'].append(element_data)
+                    for element in elements:
+                        element_data = {
+                            "type": element['type'],
+                            "bbox": element['bbox'],
+                            "index": element.get('index', 0)
+                        }
+                        
+                        # 添加类型特定的信息
+                        if element['type'] == 'text':
+                            element_data['content'] = element.get('content', '')[:200]  # 限制长度
+                        elif element['type'] == 'table':
+                            element_data['label'] = element.get('label', '表格')
+                            element_data['confidence'] = element.get('confidence', 1.0)
+                            element_data['refined'] = element.get('refined', False)  # 是否被框线修正
+                        elif element['type'] == 'vector_graphic':
+                            element_data['component_types'] = element.get('component_types', {})
+                            element_data['component_count'] = element.get('component_count', 0)
+                            element_data['component_details'] = [
+                                {'type': t, 'bbox': list(b), 'index': i}
+                                for (t, b, i) in element.get('component_details', [])
+                            ]
+                        
+                        page_data['elements'].append(element_data)
                     
-                    # 更新统计
-                    if element['type'] == 'text':
-                        metadata["summary"]["total_text_blocks"] += 1
-                    elif element['type'] == 'image':
-                        metadata["summary"]["total_images"] += 1
-                    elif element['type'] == 'table':
-                        metadata["summary"]["total_tables"] += 1
-                        if element.get('refined', False):
-                            metadata["summary"]["refined_tables"] += 1
-                    elif element['type'] == 'vector_graphic':
-                        metadata["summary"]["total_vector_graphics"] += 1
-                    elif element['type'] == 'original_line':
-                        metadata["summary"]["total_original_lines"] += 1
-                    elif element['type'] == 'original_qwen_table':
-                        metadata["summary"]["total_original_qwen_tables"] += 1
+                    # 页面数据位于pages对象内，整体缩进4格以保持与json.dump(indent=2)一致的格式
+                    if page_count > 0:
+                        f.write(b',')
+                    f.write(f'\n    "{page_num + 1}": '.encode('utf-8'))
+                    f.write(_dumps_json(page_data).replace(b'\n', b'\n    '))
                 
-                metadata["pages"][str(page_num + 1)] = page_data
-            
-            # 保存到JSON文件
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+                f.write(b'\n  }\n}' if all_elements_by_page else b'}\n}')
             
             print(f"📄 元数据已保存: {metadata_path}")
             return metadata_path
@@ -1791,17 +2913,13 @@ class PDFBboxExtractor:
         Returns:
             提取的文本内容
         """
-        text_content = ""
-        
         try:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    text_content += span.get("text", "") + " "
-            return text_content.strip()
+            return " ".join(span.get("text", "") for line in block.get("lines", []) for span in line.get("spans", [])).strip()
         except Exception as e:
             return f"[提取文本失败: {str(e)}]"
     
-    def _draw_predictions_on_image(self, image_path: str, predictions: List[Dict[str, Any]], image_filename: str) -> None:
+    def _draw_predictions_on_image(self, image_path: str, predictions: List[Dict[str, Any]], image_filename: str,
+                                   image_data: Optional[bytes] = None) -> None:
         """
         在图片上绘制Qwen预测的表格边框并保存
         
@@ -1809,29 +2927,22 @@ class PDFBboxExtractor:
             image_path: 原始图片路径
             predictions: 预测结果列表（bbox_2d已转换为图片坐标）
             image_filename: 图片文件名
+            image_data: 内存中的图片字节，提供时不再读取image_path
         """
         try:
-            from PIL import Image, ImageDraw, ImageFont
+            from PIL import Image, ImageDraw
             import os
             
             # 打开原始图片
-            img = Image.open(image_path)
+            img = Image.open(io.BytesIO(image_data)) if image_data is not None else Image.open(image_path)
             draw = ImageDraw.Draw(img)
             
             # 设置绘制参数
-            colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)]
+            colors = _PREDICTION_COLORS
             line_width = 3
             
-            # 尝试加载字体
-            try:
-                # Windows系统字体
-                font = ImageFont.truetype("arial.ttf", 20)
-            except:
-                try:
-                    # 其他系统默认字体
-                    font = ImageFont.load_default()
-                except:
-                    font = None
+            # 加载字体（已缓存）
+            font = _get_font("arial.ttf", 20)
             
             # 绘制每个预测框
             for i, pred in enumerate(predictions):
@@ -1873,8 +2984,8 @@ class PDFBboxExtractor:
             output_filename = f"{base_name}_predicted.jpg"
             output_path = os.path.join(output_dir, output_filename)
             
-            # 保存图片
-            img.save(output_path, 'JPEG', quality=95)
+            # 保存图片（仅供人工查看，质量85已足够，编码更快、文件更小）
+            img.save(output_path, 'JPEG', quality=85)
             print(f"      预测框标注图片已保存: {output_path}")
             
         except Exception as e:
@@ -1900,69 +3011,91 @@ class PDFBboxExtractor:
             return []
         
         dense_groups = []
+        group_sets = []
+        element_groups = {}
         
-        # 为每个元素创建密集区域检测
-        for i, element in enumerate(elements):
-            bbox = element['bbox']
-            center_x = (bbox[0] + bbox[2]) / 2
-            center_y = (bbox[1] + bbox[3]) / 2
-            
-            # 定义密集区域边界
-            area_left = center_x - area_size / 2
-            area_right = center_x + area_size / 2
-            area_top = center_y - area_size / 2
-            area_bottom = center_y + area_size / 2
-            
-            # 查找在此密集区域内的所有元素
-            area_elements = []
-            for j, other_element in enumerate(elements):
-                if i == j:
-                    continue
-                    
-                other_bbox = other_element['bbox']
-                other_center_x = (other_bbox[0] + other_bbox[2]) / 2
-                other_center_y = (other_bbox[1] + other_bbox[3]) / 2
-                
-                # 检查元素中心是否在密集区域内，或者元素与密集区域有重叠
-                if (area_left <= other_center_x <= area_right and area_top <= other_center_y <= area_bottom) or \
-                   self._boxes_overlap([area_left, area_top, area_right, area_bottom], other_bbox, 0.1):
-                    area_elements.append(j)
-            
-            # 如果找到密集元素，添加当前元素索引
-            if area_elements:
-                area_elements.append(i)
-                area_elements.sort()
-                
-                # 检查是否已存在相似的组
-                is_duplicate_group = False
-                for existing_group in dense_groups:
-                    if len(set(area_elements) & set(existing_group)) > len(area_elements) * 0.5:
-                        # 合并到现有组
-                        existing_group.extend(area_elements)
-                        existing_group = list(set(existing_group))  # 去重
-                        existing_group.sort()
-                        is_duplicate_group = True
-                        break
-                
-                if not is_duplicate_group:
-                    dense_groups.append(area_elements)
+        # 一次性计算所有元素的密集区域邻居：优先使用JIT编译的核函数，否则使用NumPy分块广播
+        bxs = _bboxes_to_array(elements)
+        if numba is not None:
+            offsets, neighbors = _dense_area_neighbors(bxs, area_size)
+        else:
+            offsets, neighbors = _dense_area_neighbors_numpy(bxs, area_size)
+        neighbors = neighbors.tolist()
+        offsets = offsets.tolist()
+        for i in range(len(elements)):
+            area_elements = neighbors[offsets[i]:offsets[i + 1]]
+            self._add_dense_group(dense_groups, group_sets, element_groups, area_elements, i)
+        
+        return self._merge_dense_groups(dense_groups)
+    
+    def _add_dense_group(self, dense_groups: List[List[int]], group_sets: List[set], 
+                         element_groups: Dict[int, List[int]], area_elements: List[int], index: int) -> None:
+        """
+        将元素的密集区域加入候选组（与已有组重叠过半时合并到已有组）
         
-        # 去重和合并重叠的组
-        merged_groups = []
+        Args:
+            dense_groups: 候选组列表（原地修改）
+            group_sets: 与dense_groups一一对应的元素集合，避免每次比较重新构建集合（原地修改）
+            area_elements: 密集区域内的其他元素索引
+            index: 当前元素索引
+            element_groups: 元素索引 -> 包含该元素的候选组序号列表（原地修改），
+                用于只统计与当前区域有公共元素的组，避免逐组求交集
+        """
+        # 如果找到密集元素，添加当前元素索引
+        if area_elements:
+            area_elements.append(index)
+            area_elements.sort()
+            area_set = set(area_elements)
+            threshold = len(area_elements) * 0.5
+            
+            # 检查是否已存在相似的组（取第一个公共元素超过半数的组）
+            overlap_counts = Counter()
+            for element_index in area_set:
+                overlap_counts.update(element_groups.get(element_index, ()))
+            target = min((group_index for group_index, count in overlap_counts.items() if count > threshold),
+                         default=None)
+            
+            if target is not None:
+                # 合并到现有组
+                existing_set = group_sets[target]
+                for element_index in area_set - existing_set:
+                    element_groups.setdefault(element_index, []).append(target)
+                dense_groups[target].extend(area_elements)
+                existing_set.update(area_elements)
+            else:
+                for element_index in area_set:
+                    element_groups.setdefault(element_index, []).append(len(dense_groups))
+                dense_groups.append(area_elements)
+                group_sets.append(area_set)
+    
+    def _merge_dense_groups(self, dense_groups: List[List[int]]) -> List[List[int]]:
+        """
+        合并存在公共元素的候选组（每个候选组并入第一个与之有公共元素的已合并组）
+        
+        Args:
+            dense_groups: 候选组列表
+            
+        Returns:
+            合并后至少包含2个元素的组
+        """
+        merged_sets = []
+        # 元素索引 -> 包含该元素的最靠前的已合并组序号，
+        # 候选组要并入的组即其各元素所属最靠前组中的最小者
+        first_owner = {}
         for group in dense_groups:
-            merged = False
-            for existing_group in merged_groups:
-                if len(set(group) & set(existing_group)) > 0:
-                    # 合并组
-                    existing_group.extend(group)
-                    existing_group[:] = sorted(list(set(existing_group)))
-                    merged = True
-                    break
-            if not merged:
-                merged_groups.append(sorted(list(set(group))))
+            target = min((first_owner[element_index] for element_index in group if element_index in first_owner),
+                         default=None)
+            if target is None:
+                target = len(merged_sets)
+                merged_sets.append(set(group))
+            else:
+                merged_sets[target].update(group)
+            for element_index in group:
+                if first_owner.get(element_index, target) >= target:
+                    first_owner[element_index] = target
         
-        # 过滤掉少于2个元素的组
-        return [group for group in merged_groups if len(group) >= 2]
+        # 去重排序并过滤掉少于2个元素的组
+        return [sorted(merged) for merged in merged_sets if len(merged) >= 2]
     
     def _validate_vector_graphic_group(self, elements: List[Dict[str, Any]], group_indices: List[int]) -> bool:
         """
@@ -2015,29 +3148,20 @@ class PDFBboxExtractor:
         merged_bbox = [min_x, min_y, max_x, max_y]
         
         # 统计组成元素
-        component_types = {}
+        component_types = Counter(elements[idx]['type'] for idx in group_indices)
         component_details = []
         
         for idx in group_indices:
             element = elements[idx]
             element_type = element['type']
             
-            if element_type not in component_types:
-                component_types[element_type] = 0
-            component_types[element_type] += 1
-            
-            # 保存组件详情
-            component_details.append({
-                'type': element_type,
-                'bbox': element['bbox'],
-                'index': element.get('index', 0)
-            })
+            # 保存组件详情（紧凑元组 (type, bbox, index)，写入元数据时再展开为字典）
+            component_details.append((element_type, tuple(element['bbox']), element.get('index', 0)))
         
         # 创建矢量图元素
         vector_graphic = {
             'type': 'vector_graphic',
             'bbox': merged_bbox,
-            'rect': fitz.Rect(merged_bbox),
             'index': vector_index,
             'component_types': component_types,
             'component_details': component_details,
@@ -2059,37 +3183,40 @@ class PDFBboxExtractor:
         original_count = len(elements)
         iteration = 0
         max_iterations = 10  # 防止无限循环
+        area_size = 30.0
+        dirty_bboxes = None  # 上一轮新建矢量图的扩展包围框，None表示首轮全量检测
         
         while iteration < max_iterations:
             iteration += 1
-            self._thread_safe_print(f"    矢量图检测第 {iteration} 次迭代...")
             
-            # 检测密集区域
-            dense_groups = self._detect_dense_area_elements(elements)
+            # 首轮检测全部元素；之后只有新建矢量图附近的元素及与其连通的元素才可能形成新的密集区域组
+            # （与新建矢量图不连通的部分与上一轮完全相同，其中的组上一轮已验证不合格）
+            if dirty_bboxes is None:
+                candidate_indices = list(range(len(elements)))
+            else:
+                bxs = _bboxes_to_array(elements)
+                dirty = np.array(dirty_bboxes, dtype=np.float64)
+                touched = ((bxs[:, None, 0] <= dirty[:, 2]) & (bxs[:, None, 2] >= dirty[:, 0]) &
+                           (bxs[:, None, 1] <= dirty[:, 3]) & (bxs[:, None, 3] >= dirty[:, 1]))
+                candidate_indices = np.flatnonzero(_dense_area_closure(bxs, touched.any(axis=1), area_size)).tolist()
+            
+            # 检测密集区域（组内索引映射回完整元素列表）
+            candidates = [elements[i] for i in candidate_indices]
+            dense_groups = [
+                [candidate_indices[j] for j in group]
+                for group in self._detect_dense_area_elements(candidates, area_size)
+            ]
             
             if not dense_groups:
-                self._thread_safe_print(f"    第 {iteration} 次迭代未发现密集区域，结束检测")
                 break
             
-            self._thread_safe_print(f"    第 {iteration} 次迭代发现 {len(dense_groups)} 个密集区域")
-            
-            # 验证并合并符合条件的组
+            # 验证并合并符合条件的组（需要同时包含line和image）
             valid_groups = []
             for group_indices in dense_groups:
                 if self._validate_vector_graphic_group(elements, group_indices):
                     valid_groups.append(group_indices)
-                    
-                    # 显示组内元素类型统计
-                    type_counts = {}
-                    for idx in group_indices:
-                        element_type = elements[idx]['type']
-                        type_counts[element_type] = type_counts.get(element_type, 0) + 1
-                    
-                    type_summary = ', '.join([f"{t}:{c}" for t, c in type_counts.items()])
-                    self._thread_safe_print(f"      有效矢量图组: {len(group_indices)}个元素 ({type_summary})")
             
             if not valid_groups:
-                self._thread_safe_print(f"    第 {iteration} 次迭代未发现有效矢量图组（需要同时包含line和image），结束检测")
                 break
             
             # 创建新的元素列表
@@ -2098,11 +3225,16 @@ class PDFBboxExtractor:
             vector_index = 0
             
             # 添加矢量图
+            dirty_bboxes = []
             for group_indices in valid_groups:
                 vector_graphic = self._merge_elements_to_vector_graphic(elements, group_indices, vector_index)
                 new_elements.append(vector_graphic)
                 used_indices.update(group_indices)
                 vector_index += 1
+                
+                vg_bbox = vector_graphic['bbox']
+                dirty_bboxes.append([vg_bbox[0] - area_size, vg_bbox[1] - area_size,
+                                     vg_bbox[2] + area_size, vg_bbox[3] + area_size])
             
             # 添加未被合并的元素
             for i, element in enumerate(elements):
@@ -2110,9 +3242,6 @@ class PDFBboxExtractor:
                     new_elements.append(element)
             
             merged_count = len(used_indices)
-            vector_count = len(valid_groups)
-            
-            self._thread_safe_print(f"    第 {iteration} 次迭代完成: 合并了 {merged_count} 个元素为 {vector_count} 个矢量图")
             
             # 更新元素列表
             elements = new_elements
@@ -2125,17 +3254,92 @@ class PDFBboxExtractor:
         total_vector_graphics = sum(1 for e in elements if e['type'] == 'vector_graphic')
         
         if total_vector_graphics > 0:
-            self._thread_safe_print(f"  矢量图检测完成: {original_count} → {final_count} 个元素 (创建了 {total_vector_graphics} 个矢量图)")
+            self._thread_safe_print(f"  矢量图检测完成: {original_count} → {final_count} 个元素 (迭代 {iteration} 次，创建了 {total_vector_graphics} 个矢量图)")
         else:
             self._thread_safe_print(f"  矢量图检测完成: 未发现符合条件的矢量图")
         
         return elements
 
 
+# 进程池工作进程内的状态（每个进程打开一次PDF文档并复用同一个提取器）
+_worker_state = {}
+
+
+def _init_page_worker(pdf_path: str) -> None:
+    """
+    进程池初始化函数：在工作进程中打开PDF文档并创建提取器
+    
+    Args:
+        pdf_path: PDF文件路径
+    """
+    _worker_state['documents'] = _ThreadLocalDocuments(pdf_path)
+    _worker_state['extractor'] = PDFBboxExtractor(max_workers=1, verbose=False)
+
+
+def _refine_tables_in_worker(page_num: int, tables: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    在工作进程中提取页面框线并修正表格边框
+    
+    Args:
+        page_num: 页面编号（从0开始）
+        tables: 原始表格预测列表
+        
+    Returns:
+        修正后的表格列表
+    """
+    page = _worker_state['documents'].get()[page_num]
+    return _worker_state['extractor']._refine_table_predictions(tables, page)
+
+
+def _extract_page_elements_in_worker(page_num: int, tables: List[Dict[str, Any]],
+                                     original_qwen_tables: List[Dict[str, Any]], page_stats: PageStats,
+                                     show_original_lines: bool) -> Tuple[List[Dict[str, Any]], PageStats]:
+    """
+    在工作进程中执行页面的CPU密集阶段（元素提取和矢量图检测）
+    
+    Args:
+        page_num: 页面编号（从0开始）
+        tables: 已检测的表格列表
+        original_qwen_tables: 原始Qwen表格框线列表
+        page_stats: 页面统计
+        show_original_lines: 是否提取PDF原始框线
+        
+    Returns:
+        (页面全部元素列表, 更新后的页面统计)
+    """
+    page = _worker_state['documents'].get()[page_num]
+    all_elements = _worker_state['extractor']._extract_page_elements(
+        page, page_num, tables, original_qwen_tables, page_stats, show_original_lines
+    )
+    return all_elements, page_stats
+
+
+@functools.lru_cache(maxsize=4)
+def _get_extractor(max_workers: int, verbose: bool, save_prediction_images: bool) -> PDFBboxExtractor:
+    """
+    获取按配置缓存的提取器（提取器不保存单次处理的状态，可在多次调用及并行处理多个PDF时复用，
+    日志线程也只需启动一次）
+    
+    Args:
+        max_workers: 最大工作线程数
+        verbose: 是否输出逐页处理日志
+        save_prediction_images: 是否保存Qwen预测框标注图片
+        
+    Returns:
+        PDF边框提取器
+    """
+    return PDFBboxExtractor(max_workers=max_workers, verbose=verbose, save_prediction_images=save_prediction_images)
+
+
 def extract_pdf_bboxes(input_pdf_path: str, output_dir: str = "tmp", enable_table_detection: bool = True, 
                        model_id: str = "Qwen/Qwen2.5-VL-7B-Instruct", max_retries: int = 3, retry_delay: float = 1.0,
                        max_workers: int = 10, show_original_lines: bool = False, 
-                       show_original_qwen_tables: bool = False) -> Dict[str, Any]:
+                       show_original_qwen_tables: bool = False, verbose: bool = True,
+                       use_cache: bool = False, force_refresh: bool = False,
+                       precheck_batch_size: int = 1, use_processes: bool = False,
+                       vlm_max_side: Optional[int] = 1280, vlm_quality: int = 85,
+                       skip_pages_without_graphics: bool = False,
+                       save_prediction_images: bool = False) -> Dict[str, Any]:
     """
     提取PDF边界框的主函数（支持多线程）
     
@@ -2149,6 +3353,15 @@ def extract_pdf_bboxes(input_pdf_path: str, output_dir: str = "tmp", enable_tabl
         max_workers: 最大工作线程数，默认10个
         show_original_lines: 是否显示PDF原始框线
         show_original_qwen_tables: 是否显示原始Qwen表格框线
+        verbose: 是否输出逐页处理日志
+        use_cache: 是否在输出目录中缓存逐页结果（bbox_cache.sqlite），未变化的页面无需重新处理；默认关闭
+        force_refresh: 是否忽略已有缓存强制重新处理所有页面
+        precheck_batch_size: 表格预检查时每次API调用包含的页面数（如4或9），1表示逐页预检查，0表示不做预检查直接检测
+        use_processes: 是否使用进程池并行执行CPU密集的表格边框修正和矢量图检测（多核机器上适合页数较多的PDF）
+        vlm_max_side: 上传给模型的页面图片最长边上限（像素），None表示按300DPI渲染
+        vlm_quality: 上传图片的JPEG质量
+        skip_pages_without_graphics: 是否跳过既无图像也无矢量绘图的纯文本页面的表格检测
+        save_prediction_images: 是否将Qwen预测框标注图片保存到tmp目录（调试用）
         
     Returns:
         处理结果
@@ -2163,9 +3376,13 @@ def extract_pdf_bboxes(input_pdf_path: str, output_dir: str = "tmp", enable_tabl
         output_filename = f"{filename_without_ext}_bbox.pdf"
         output_path = os.path.join(output_dir, output_filename)
         
-        # 创建提取器并处理（支持自定义线程数）
-        extractor = PDFBboxExtractor(max_workers=max_workers)
-        result = extractor.process_pdf(input_pdf_path, output_path, enable_table_detection, model_id, max_retries, retry_delay, show_original_lines, show_original_qwen_tables)
+        # 获取提取器并处理（支持自定义线程数；相同配置的提取器跨调用复用）
+        cache_path = os.path.join(output_dir, "bbox_cache.sqlite") if use_cache else None
+        extractor = _get_extractor(max_workers, verbose, save_prediction_images)
+        result = extractor.process_pdf(input_pdf_path, output_path, enable_table_detection, model_id, max_retries, retry_delay,
+                                       show_original_lines, show_original_qwen_tables, cache_path, force_refresh,
+                                       precheck_batch_size, use_processes, vlm_max_side, vlm_quality,
+                                       skip_pages_without_graphics)
         
         return result
         
@@ -2183,6 +3400,38 @@ def extract_pdf_bboxes(input_pdf_path: str, output_dir: str = "tmp", enable_tabl
         }
 
 
+def extract_pdf_bboxes_batch(input_pdf_paths: List[str], output_dir: str = "tmp",
+                             max_documents: Optional[int] = None, **kwargs) -> List[Dict[str, Any]]:
+    """
+    并行提取多个PDF的边界框（每个PDF内部仍按页多线程处理）
+    
+    不同PDF的文件读取、页面渲染与模型API等待相互重叠；启用use_cache时逐页结果缓存在输出目录中共享。
+    缓存按PDF内容（MD5）而非路径索引，内容完全相同的输入文件会复用彼此已缓存的页面结果。
+    
+    Args:
+        input_pdf_paths: 输入PDF文件路径列表（文件名需互不相同，输出文件按文件名命名）
+        output_dir: 输出目录
+        max_documents: 同时处理的PDF数量上限，默认为CPU核心数
+        **kwargs: 传给extract_pdf_bboxes的其他参数（如enable_table_detection、max_workers等）
+        
+    Returns:
+        与输入顺序一致的处理结果列表
+    """
+    if not input_pdf_paths:
+        return []
+    
+    if max_documents is None:
+        max_documents = os.cpu_count() or 1
+    max_documents = max(1, min(max_documents, len(input_pdf_paths)))
+    
+    with ThreadPoolExecutor(max_workers=max_documents) as executor:
+        futures = [
+            executor.submit(extract_pdf_bboxes, input_pdf_path, output_dir, **kwargs)
+            for input_pdf_path in input_pdf_paths
+        ]
+        return [future.result() for future in futures]
+
+
 if __name__ == "__main__":
     # 测试代码
     test_pdf = "test.pdf"
@@ -1,10 +1,105 @@
 import fitz  # PyMuPDF
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor
 import os
-from typing import List, Tuple
-import uuid
+from typing import List, Optional, Tuple
+from PIL import Image
 
 
-def pdf_to_jpg(pdf_file_bytes: bytes, pdf_filename: str = None, output_dir: str = "tmp", dpi: int = 150) -> List[str]:
+# 进程池工作进程中打开的PDF文档（每个进程只打开一次）
+_worker_document = None
+
+# pdf_to_jpg(isolate=None)时超过该大小的PDF在子进程中渲染：MuPDF渲染占用的内存在close()后也不能完全归还，
+# 子进程退出时由操作系统回收，长时间运行的服务进程内存不会随处理过的大文件增长
+_ISOLATED_RENDER_MIN_BYTES = 50 * 1024 * 1024
+
+
+def _render_page(page: fitz.Page, mat: fitz.Matrix, grayscale: bool = False) -> fitz.Pixmap:
+    """
+    渲染单个页面为Pixmap
+    
+    Args:
+        page: PyMuPDF页面对象
+        mat: 缩放矩阵
+        grayscale: 是否渲染为灰度图片
+    
+    Returns:
+        渲染得到的Pixmap
+    """
+    # 显式关闭alpha通道，保证Pixmap为3通道（灰度时1通道），可直接按RGB/L模式交给Pillow编码JPEG
+    return page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY if grayscale else fitz.csRGB, alpha=False)
+
+
+def _save_pixmap_as_jpg(pix: fitz.Pixmap, output_path: str, quality: int) -> None:
+    """
+    将Pixmap编码为JPG图片并保存
+    
+    Args:
+        pix: 页面Pixmap（RGB或灰度）
+        output_path: 输出图片路径
+        quality: JPEG质量
+    """
+    mode = "L" if pix.n == 1 else "RGB"
+    
+    # 保存图片：使用Pillow编码基线JPEG（Pixmap自带的编码器输出渐进式JPEG，慢约10倍），
+    # 优化哈夫曼表使文件大小与原先相当；图片直接引用Pixmap的像素内存（不复制），编码完成前需保持pix存活
+    img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, 0, 1)
+    img.save(output_path, "JPEG", quality=quality, optimize=True)
+    img.close()
+
+
+def _render_page_to_jpg(page: fitz.Page, mat: fitz.Matrix, output_path: str, quality: int,
+                        grayscale: bool = False) -> None:
+    """
+    渲染单个页面并保存为JPG图片
+    
+    Args:
+        page: PyMuPDF页面对象
+        mat: 缩放矩阵
+        output_path: 输出图片路径
+        quality: JPEG质量
+        grayscale: 是否渲染为灰度图片
+    """
+    pix = _render_page(page, mat, grayscale)
+    _save_pixmap_as_jpg(pix, output_path, quality)
+    
+    # 释放内存
+    pix = None
+
+
+def _init_render_worker(pdf_file_bytes: bytes) -> None:
+    """
+    进程池初始化函数：在工作进程中打开PDF文档
+    
+    Args:
+        pdf_file_bytes: PDF文件的字节数据
+    """
+    global _worker_document
+    _worker_document = fitz.open("pdf", pdf_file_bytes)
+
+
+def _render_pages_in_worker(page_nums: List[int], output_paths: List[str], dpi: int, quality: int,
+                            grayscale: bool) -> None:
+    """
+    在工作进程中渲染一组页面并保存为JPG图片
+    
+    Args:
+        page_nums: 页面编号列表（从0开始）
+        output_paths: 与页面编号对应的输出图片路径
+        dpi: 图片分辨率
+        quality: JPEG质量
+        grayscale: 是否渲染为灰度图片
+    """
+    zoom = dpi / 72  # 72是PDF的默认DPI
+    mat = fitz.Matrix(zoom, zoom)
+    for page_num, output_path in zip(page_nums, output_paths):
+        _render_page_to_jpg(_worker_document.load_page(page_num), mat, output_path, quality, grayscale)
+
+
+def pdf_to_jpg(pdf_file_bytes: bytes, pdf_filename: str = None, output_dir: str = "tmp", dpi: int = 150,
+               quality: int = 95, max_workers: int = 1, colorspace: str = "rgb",
+               isolate: Optional[bool] = False) -> List[str]:
     """
     将PDF文件转换为JPG图片
     
@@ -13,6 +108,16 @@ def pdf_to_jpg(pdf_file_bytes: bytes, pdf_filename: str = None, output_dir: str
         pdf_filename: PDF文件名（不含扩展名），用于创建子文件夹
         output_dir: 输出目录，默认为tmp
         dpi: 图片分辨率，默认150
+        quality: JPEG质量，默认95
+        max_workers: 并行渲染的进程数，默认1（在当前进程中逐页渲染）；页数较多的PDF可设为CPU核心数
+        colorspace: 图片颜色空间，"rgb"（默认）或"gray"；下游只需识别文字时可用灰度图片，
+            像素数据为RGB的1/3，JPEG文件更小、编码更快
+        isolate: 是否在子进程中渲染（max_workers为1时也使用单进程的进程池），进程退出后渲染内存全部归还系统；
+            默认False；None表示PDF超过50MB时自动启用，适用于长时间运行的服务进程
+    
+    Note:
+        使用子进程渲染（isolate或max_workers大于1）时进程以spawn方式启动，会重新导入主模块，
+        直接运行的脚本需在 if __name__ == "__main__": 下调用本函数
     
     Returns:
         转换后的JPG文件路径列表
@@ -27,44 +132,103 @@ def pdf_to_jpg(pdf_file_bytes: bytes, pdf_filename: str = None, output_dir: str
     if not os.path.exists(final_output_dir):
         os.makedirs(final_output_dir)
     
-    # 生成唯一的文件名前缀
-    file_prefix = str(uuid.uuid4()) if not pdf_filename else pdf_filename
-    output_paths = []
+    if colorspace not in ("rgb", "gray"):
+        raise ValueError(f"不支持的颜色空间: {colorspace}")
+    grayscale = colorspace == "gray"
     
+    # 生成文件名前缀：未提供文件名时使用PDF内容的哈希，同一文件重复转换得到相同的输出路径
+    file_prefix = pdf_filename if pdf_filename else hashlib.blake2b(pdf_file_bytes, digest_size=8).hexdigest()
+    
+    pdf_document = None
     try:
         # 打开PDF文件
         pdf_document = fitz.open("pdf", pdf_file_bytes)
+        page_count = len(pdf_document)
         
-        # 遍历每一页
-        for page_num in range(len(pdf_document)):
-            # 获取页面
-            page = pdf_document.load_page(page_num)
-            
-            # 设置缩放比例以调整图片质量
-            zoom = dpi / 72  # 72是PDF的默认DPI
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # 渲染页面为图片
-            pix = page.get_pixmap(matrix=mat)
-            
-            # 生成输出文件名
-            output_filename = f"{file_prefix}_page_{page_num + 1}.jpg"
-            output_path = os.path.join(final_output_dir, output_filename)
-            
-            # 保存图片
-            pix.save(output_path)
-            output_paths.append(output_path)
-            
-            # 释放内存
-            pix = None
+        # 生成输出文件名
+        output_paths = [os.path.join(final_output_dir, f"{file_prefix}_page_{page_num + 1}.jpg") for page_num in range(page_count)]
         
-        # 关闭PDF文档
-        pdf_document.close()
+        if isolate is None:
+            isolate = len(pdf_file_bytes) > _ISOLATED_RENDER_MIN_BYTES
+        if isolate or (max_workers > 1 and page_count > 1):
+            _render_pages_in_processes(pdf_file_bytes, output_paths, dpi, quality, max(1, max_workers), grayscale)
+            return output_paths
+        
+        # 设置缩放比例以调整图片质量
+        zoom = dpi / 72  # 72是PDF的默认DPI
+        mat = fitz.Matrix(zoom, zoom)
+        
+        # 遍历每一页
+        if (os.cpu_count() or 1) > 1:
+            # 多核时Pillow编码JPEG期间释放GIL，由一个编码线程保存上一页，与当前页的渲染重叠；
+            # 最多保留一页待编码的Pixmap，内存占用与逐页处理相当（单核时线程切换反而更慢）
+            with ThreadPoolExecutor(max_workers=1) as encoder:
+                pending = None
+                for page_num, page in enumerate(pdf_document):
+                    pix = _render_page(page, mat, grayscale)
+                    if pending is not None:
+                        pending.result()
+                    pending = encoder.submit(_save_pixmap_as_jpg, pix, output_paths[page_num], quality)
+                    pix = None
+                if pending is not None:
+                    pending.result()
+        else:
+            for page_num, page in enumerate(pdf_document):
+                _render_page_to_jpg(page, mat, output_paths[page_num], quality, grayscale)
         
         return output_paths
         
     except Exception as e:
         raise Exception(f"PDF转换过程中出现错误: {str(e)}")
+    
+    finally:
+        # 关闭PDF文档（转换出错时也关闭），并清空MuPDF的全局资源缓存（字体、图像等），
+        # 避免长时间运行的进程中缓存随处理过的文档持续增长
+        if pdf_document is not None:
+            pdf_document.close()
+        fitz.TOOLS.store_shrink(100)
+
+
+def _render_pages_in_processes(pdf_file_bytes: bytes, output_paths: List[str], dpi: int, quality: int,
+                               max_workers: int, grayscale: bool = False) -> None:
+    """
+    使用进程池并行渲染所有页面（每个进程只打开一次文档，每个任务渲染一段连续页面）
+    
+    Args:
+        pdf_file_bytes: PDF文件的字节数据
+        output_paths: 各页输出图片路径
+        dpi: 图片分辨率
+        quality: JPEG质量
+        max_workers: 进程数
+        grayscale: 是否渲染为灰度图片
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    page_count = len(output_paths)
+    max_workers = min(max_workers, page_count)
+    # 每个进程分到约4段页面，兼顾负载均衡与任务调度开销
+    chunk_size = math.ceil(page_count / (max_workers * 4))
+    
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_render_worker,
+        initargs=(pdf_file_bytes,)
+    ) as executor:
+        futures = [
+            executor.submit(
+                _render_pages_in_worker,
+                list(range(start, min(start + chunk_size, page_count))),
+                output_paths[start:start + chunk_size],
+                dpi,
+                quality,
+                grayscale
+            )
+            for start in range(0, page_count, chunk_size)
+        ]
+        for future in futures:
+            future.result()
 
 
 def get_pdf_info(pdf_file_bytes: bytes) -> dict:
@@ -114,20 +278,21 @@ def clean_tmp_folder(output_dir: str = "tmp", keep_latest: int = 0, pdf_filename
         else:
             # 清理所有转换图片相关文件夹
             if os.path.exists(output_dir):
-                files = os.listdir(output_dir)
-                conversion_dirs = [f for f in files if f.endswith('_converted_to_img') and os.path.isdir(os.path.join(output_dir, f))]
+                # 使用scandir一次读取目录项，文件类型判断无需额外的stat调用
+                with os.scandir(output_dir) as entries:
+                    conversion_dirs = [e for e in entries if e.name.endswith('_converted_to_img') and e.is_dir()]
                 
                 if keep_latest > 0 and conversion_dirs:
                     # 按修改时间排序，保留最新的几个
-                    conversion_dirs.sort(key=lambda x: os.path.getmtime(os.path.join(output_dir, x)), reverse=True)
+                    conversion_dirs.sort(key=lambda e: e.stat().st_mtime, reverse=True)
                     dirs_to_delete = conversion_dirs[keep_latest:]
                 else:
                     dirs_to_delete = conversion_dirs
                 
-                for dir_name in dirs_to_delete:
+                for entry in dirs_to_delete:
                     try:
                         import shutil
-                        shutil.rmtree(os.path.join(output_dir, dir_name))
+                        shutil.rmtree(entry.path)
                     except Exception:
                         pass
                 